@@ -0,0 +1,75 @@
+import tempfile
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from superlists.benchmarking import benchmark_database, timer
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'accounts.session_store',
+)
+
+
+def logged_in_view(SessionStore, session_key):
+    session = SessionStore(session_key)
+    session.get(SESSION_KEY)
+    if session.modified:
+        session.save()
+
+
+def logged_in_rewrite(SessionStore, session_key):
+    session = SessionStore(session_key)
+    session[SESSION_KEY] = session[SESSION_KEY]
+    session.save()
+
+
+def anonymous_message(SessionStore, session_key):
+    # send_login_email leaves a message; the redirected page reads it.
+    session = SessionStore()
+    session['_messages'] = '[["__json_message", 0, 25, "Check your email"]]'
+    session.save()
+    session = SessionStore(session.session_key)
+    session.pop('_messages')
+    session.save()
+
+
+SCENARIOS = (logged_in_view, logged_in_rewrite, anonymous_message)
+QUERY_COUNT_REQUESTS = 100
+
+
+class Command(BaseCommand):
+    help = 'Compares per-request session load/save cost of the db, cached_db and accounts session engines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with benchmark_database('sessions'), tempfile.TemporaryDirectory() as cache_dir:
+            caches = {'session-benchmark': dict(settings.CACHES[settings.SESSION_CACHE_ALIAS], LOCATION=cache_dir)}
+            with override_settings(CACHES=caches, SESSION_CACHE_ALIAS='session-benchmark'):
+                self.stdout.write(f'{"scenario":>18} {"engine":>42} {"us/request":>11} {"queries/request":>16}')
+                for scenario in SCENARIOS:
+                    for engine in ENGINES:
+                        micros, queries = self.run_scenario(engine, scenario, options['requests'])
+                        self.stdout.write(f'{scenario.__name__:>18} {engine:>42} {micros:>11.0f} {queries:>16.2f}')
+
+    def run_scenario(self, engine, scenario, requests):
+        SessionStore = import_module(engine).SessionStore
+        session = SessionStore()
+        session[SESSION_KEY] = 'bench@example.com'
+        session.save()
+        with timer() as timing:
+            for _ in range(requests):
+                scenario(SessionStore, session.session_key)
+        # Counted separately: the query log only keeps the last 9000 queries.
+        connections['sessions'].queries_log.clear()
+        with CaptureQueriesContext(connections['sessions']) as queries:
+            for _ in range(QUERY_COUNT_REQUESTS):
+                scenario(SessionStore, session.session_key)
+        return timing['seconds'] * 1e6 / requests, len(queries) / QUERY_COUNT_REQUESTS
@@ -0,0 +1,56 @@
+import hashlib
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+# cached_db sessions, with two changes for this app:
+#  * a save that would write back exactly what was loaded is skipped;
+#  * sessions without a logged-in user (in practice, the messages left by
+#    send_login_email) are kept in the per-host cache only and never touch
+#    the sessions database. Losing one only loses a pending flash message.
+# A cache-only session is inserted into the database when its user logs in.
+# Logged-in sessions are still written through, in the request, rather than
+# behind: the per-host cache can lose entries, and a login lost with a
+# pending database write would sign the user out. Skipping unchanged saves
+# already removes most of those writes.
+class SessionStore(CachedDBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._loaded_digest = None
+        self._in_database = False
+
+    def digest(self, data):
+        return hashlib.sha1(self.serializer().dumps(data)).digest()
+
+    def load(self):
+        data = super().load()
+        self._loaded_digest = self.digest(data) if self.session_key else None
+        self._in_database = SESSION_KEY in data
+        return data
+
+    def create(self):
+        self._in_database = False
+        super().create()
+
+    def save(self, must_create=False):
+        data = self._get_session(no_load=must_create)
+        digest = self.digest(data)
+        if not must_create and self.session_key is not None and digest == self._loaded_digest:
+            return
+        if SESSION_KEY in data or self._in_database:
+            super().save(must_create=must_create or not self._in_database)
+            self._in_database = True
+        else:
+            self.save_to_cache(data, must_create)
+        self._loaded_digest = digest
+
+    def save_to_cache(self, data, must_create):
+        if self.session_key is None:
+            return self.create()
+        if must_create:
+            if not self._cache.add(self.cache_key, data, self.get_expiry_age()):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
@@ -0,0 +1,58 @@
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from accounts.session_store import SessionStore
+
+
+@override_settings(SESSION_CACHE_ALIAS="default")
+class SessionStoreTest(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def saved_session(self, **data):
+        session = SessionStore()
+        session.update(data)
+        session.save()
+        return session
+
+    def test_anonymous_sessions_stay_out_of_the_database(self):
+        session = self.saved_session(_messages="check your email")
+
+        self.assertFalse(Session.objects.filter(session_key=session.session_key).exists())
+        self.assertEqual(SessionStore(session.session_key)["_messages"], "check your email")
+
+    def test_logged_in_sessions_are_stored_in_the_database(self):
+        session = self.saved_session(**{SESSION_KEY: "a@b.com"})
+        caches["default"].clear()
+
+        self.assertTrue(Session.objects.filter(session_key=session.session_key).exists())
+        self.assertEqual(SessionStore(session.session_key)[SESSION_KEY], "a@b.com")
+
+    def test_unchanged_session_is_not_written_back(self):
+        session = self.saved_session(**{SESSION_KEY: "a@b.com"})
+        loaded = SessionStore(session.session_key)
+        loaded[SESSION_KEY] = "a@b.com"
+
+        with self.assertNumQueries(0, using="sessions"):
+            loaded.save()
+
+    def test_changed_session_is_written(self):
+        session = self.saved_session(**{SESSION_KEY: "a@b.com"})
+        loaded = SessionStore(session.session_key)
+        loaded["_messages"] = "hello"
+        loaded.save()
+        caches["default"].clear()
+
+        self.assertEqual(SessionStore(session.session_key)["_messages"], "hello")
+
+    def test_anonymous_session_moves_to_the_database_on_login(self):
+        session = self.saved_session(_messages="check your email")
+        loaded = SessionStore(session.session_key)
+        loaded[SESSION_KEY] = "a@b.com"
+        loaded.save()
+
+        self.assertTrue(Session.objects.filter(session_key=session.session_key).exists())
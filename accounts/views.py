@@ -4,13 +4,19 @@ from django.core.mail import send_mail
 from django.shortcuts import redirect
 
 from accounts import models
+from tasks.queue import task
+
+
+@task(priority=10)
+def send_login_mail(subject, body, from_email, recipient_list):
+    send_mail(subject, body, from_email, recipient_list)
 
 
 def send_login_email(request):
     email = request.POST["email"]
     url = models.get_uid_url_for_email(email, request)
     message_body = f'Use this link to log in:\n\n{url}'
-    send_mail(
+    send_login_mail.defer(
         'Your login link for Superlists',
         message_body,
         'noreply@superlists',
@@ -0,0 +1,99 @@
+"""Compares gunicorn startup with the default settings and with gunicorn.conf.py.
+
+For each configuration it measures the time until the first response and
+the latency of the first request served by every worker, then reports
+each worker's RSS and PSS (PSS counts shared copy-on-write pages only
+fractionally, so it shows how much the preload actually shares).
+
+    python deploy_tools/bench_gunicorn_startup.py --workers 3
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.client import HTTPConnection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUNICORN = os.path.join(os.path.dirname(sys.executable), 'gunicorn')
+CONFIG = os.path.join(ROOT, 'deploy_tools', 'gunicorn.conf.py')
+WARM_PATHS = ['/', '/lists/users/nobody@example.com/']
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def get(socket_path, path):
+    connection = UnixHTTPConnection(socket_path)
+    start = time.perf_counter()
+    connection.request('GET', path)
+    connection.getresponse().read()
+    connection.close()
+    return time.perf_counter() - start
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory_kb(pid):
+    usage = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                usage[key] = int(value.split()[0])
+    return usage
+
+
+def run(label, extra_args, workers):
+    socket_path = os.path.join(tempfile.mkdtemp(), 'bench.socket')
+    command = [GUNICORN, '--bind', f'unix:{socket_path}', '--workers', str(workers)]
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers))
+    start = time.perf_counter()
+    server = subprocess.Popen(command + extra_args + ['superlists.wsgi:application'], cwd=ROOT, env=env,
+                              stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                get(socket_path, '/')
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if server.poll() is not None:
+                    raise RuntimeError(f'gunicorn exited with status {server.returncode}')
+                time.sleep(0.01)
+        first_response = time.perf_counter() - start
+        while len(children(server.pid)) < workers:
+            time.sleep(0.01)
+        first_requests = [max(get(socket_path, path) for path in WARM_PATHS) for _ in range(workers * 2)]
+        print(f'{label}: first response after {first_response * 1000:.0f} ms, '
+              f'slowest early request {max(first_requests) * 1000:.1f} ms')
+        for pid in children(server.pid):
+            usage = memory_kb(pid)
+            print(f'  worker {pid}: RSS {usage["Rss"] / 1024:.1f} MiB, PSS {usage["Pss"] / 1024:.1f} MiB')
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+    run('default', [], args.workers)
+    run('gunicorn.conf.py', ['--config', CONFIG], args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,9 @@ def deploy():
         _update_virtualenv()
         _create_or_update_dotenv()
         _update_static_files()
+        _backup_database()
         _update_database()
+        _render_snapshots()
 
 
 def _get_latest_source():
@@ -49,5 +51,14 @@ def _update_static_files():
     run('./virtualenv/bin/python manage.py collectstatic --noinput')
     
 
+def _backup_database():
+    run('./virtualenv/bin/python manage.py backup_database')
+
+
 def _update_database():
     run('./virtualenv/bin/python manage.py migrate --noinput')
+    run('./virtualenv/bin/python manage.py migrate --database sessions --noinput')
+
+
+def _render_snapshots():
+    run('./virtualenv/bin/python manage.py render_snapshots')
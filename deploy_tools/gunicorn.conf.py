@@ -0,0 +1,42 @@
+import gc
+import os
+
+# Collecting during startup only moves objects around in memory pages that
+# the workers would otherwise share copy-on-write with the master.
+gc.disable()
+
+preload_app = True
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+
+def enable_gc():
+    # Move everything built so far into the permanent generation so the
+    # workers' collector never touches (and never dirties) those pages.
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    gc.enable()
+
+
+def when_ready(server):
+    from ops.warmup import warm_up
+    warm_up()
+    enable_gc()
+
+
+# A SIGHUP re-executes this file, and with it the gc.disable() above, but
+# doesn't call when_ready again.
+def on_reload(server):
+    enable_gc()
+
+
+def post_fork(server, worker):
+    gc.enable()
+
+
+def worker_exit(server, worker):
+    from lists.counters import view_counts
+    from lists.snapshots import renderer
+    view_counts.flush()
+    renderer.shutdown()
@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from lists.models import ListViewCount
+
+
+@admin.register(ListViewCount)
+class ListViewCountAdmin(admin.ModelAdmin):
+    list_display = ("list", "views", "last_viewed_at")
+    ordering = ("-views",)
@@ -0,0 +1,95 @@
+import json
+import time
+import zlib
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from lists.models import Item, ItemChange, List, ListArchive, ListViewCount
+
+
+def encode_items(rows):
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode(), 9)
+
+
+def decode_items(payload):
+    return json.loads(zlib.decompress(payload).decode())
+
+
+def archive_list(list_id):
+    # Flagging the list first takes the write lock, so no item can be added
+    # between reading the items and deleting them. Items go with one plain
+    # SQL DELETE rather than QuerySet.delete(): Item's post_delete handler
+    # would log every archived item as deleted in the change feed.
+    with transaction.atomic():
+        if not List.objects.filter(pk=list_id, archived=False).update(archived=True):
+            return None
+        rows = list(Item.objects.filter(list_id=list_id).values_list("pk", "text", "position"))
+        if not rows:
+            transaction.set_rollback(True)
+            return None
+        payload = encode_items(rows)
+        ListArchive.objects.create(list_id=list_id, item_count=len(rows), payload=payload)
+        table = connection.ops.quote_name(Item._meta.db_table)
+        column = connection.ops.quote_name(Item._meta.get_field("list").column)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE {column} = %s", [list_id])
+    return Counter(lists=1, items=len(rows), item_bytes=sum(len(text.encode()) for _, text, _ in rows),
+                   archive_bytes=len(payload))
+
+
+def rehydrate(list_):
+    # Puts the items back under their old pks (and so their old change
+    # feed ids) without sending post_save, since they aren't new items.
+    # Whoever clears the flag first restores the items; a concurrent
+    # request finds nothing left to do.
+    with transaction.atomic():
+        if List.objects.filter(pk=list_.pk, archived=True).update(archived=False):
+            archive = ListArchive.objects.get(list_id=list_.pk)
+            Item.objects.bulk_create(
+                Item(pk=pk, list_id=list_.pk, text=text, position=position)
+                for pk, text, position in decode_items(archive.payload)
+            )
+            archive.delete()
+    list_.archived = False
+
+
+def inactive_list_ids(list_ids, cutoff):
+    active = set(ItemChange.objects.filter(list_id__in=list_ids, changed_at__gte=cutoff)
+                 .values_list("list_id", flat=True).distinct())
+    active.update(ListViewCount.objects.filter(list_id__in=list_ids, last_viewed_at__gte=cutoff)
+                  .values_list("list_id", flat=True))
+    return [list_id for list_id in list_ids if list_id not in active]
+
+
+def free_bytes():
+    if connection.vendor != "sqlite":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA page_size")
+        page_size = cursor.fetchone()[0]
+        cursor.execute("PRAGMA freelist_count")
+        return page_size * cursor.fetchone()[0]
+
+
+# Walks the lists in pk order a batch at a time and archives those with no
+# item change and no view in the last `days` days, one short transaction
+# per list so page views never wait long on the job.
+def archive_inactive_lists(days, batch_size, pause_seconds, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    totals = Counter()
+    last_pk = 0
+    while True:
+        # Published lists are read through their snapshots, which count no views.
+        list_ids = list(List.objects.filter(pk__gt=last_pk, archived=False, published=False).order_by("pk")
+                        .values_list("pk", flat=True)[:batch_size])
+        if not list_ids:
+            return totals
+        last_pk = list_ids[-1]
+        for list_id in inactive_list_ids(list_ids, cutoff):
+            totals.update(archive_list(list_id) or {})
+        if len(list_ids) < batch_size:
+            return totals
+        time.sleep(pause_seconds)
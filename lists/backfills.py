@@ -0,0 +1,19 @@
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from lists.models import Item, ListMembership
+from ops.backfill import Backfill
+
+
+# Memberships created while their list had no items have an empty display
+# name; this fills it in from the list's first item, as create_new does.
+# Run with `manage.py run_backfill lists.backfills.MembershipDisplayNames`.
+class MembershipDisplayNames(Backfill):
+    model = ListMembership
+
+    def queryset(self):
+        return super().queryset().filter(display_name="")
+
+    def update(self, queryset):
+        first_item_text = Item.objects.filter(list_id=OuterRef("list_id")).order_by("pk").values("text")[:1]
+        return queryset.update(display_name=Coalesce(Subquery(first_item_text), Value("")))
@@ -0,0 +1,77 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.db import IntegrityError, connection, transaction
+
+BATCH_INTERVAL_SECONDS = 0.005
+MAX_BATCH_SIZE = 200
+WRITE_TIMEOUT_SECONDS = 10
+
+
+# Group-commits item inserts from many request threads. Each item gets its
+# own savepoint inside the shared transaction, so a duplicate only fails its
+# own future while the whole batch pays for a single commit.
+class ItemWriteQueue:
+    def __init__(self, interval=BATCH_INTERVAL_SECONDS, max_batch_size=MAX_BATCH_SIZE):
+        self.interval = interval
+        self.max_batch_size = max_batch_size
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._committer = None
+
+    def submit(self, item):
+        future = Future()
+        self._pending.put((item, future))
+        self._ensure_committer()
+        return future
+
+    def save(self, item, timeout=WRITE_TIMEOUT_SECONDS):
+        return self.submit(item).result(timeout)
+
+    def _ensure_committer(self):
+        with self._lock:
+            if self._committer is None or not self._committer.is_alive():
+                self._committer = threading.Thread(target=self._run, name="item-write-committer", daemon=True)
+                self._committer.start()
+
+    def _run(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(batch)
+
+    def flush(self, batch):
+        results = []
+        try:
+            with transaction.atomic():
+                for item, future in batch:
+                    try:
+                        with transaction.atomic():
+                            item.save()
+                    except IntegrityError as e:
+                        results.append((future, None, e))
+                    else:
+                        results.append((future, item, None))
+        except Exception as e:
+            for item, future in batch:
+                future.set_exception(e)
+            connection.close_if_unusable_or_obsolete()
+            return
+        for future, item, error in results:
+            if error is None:
+                future.set_result(item)
+            else:
+                future.set_exception(error)
+
+
+item_writes = ItemWriteQueue()
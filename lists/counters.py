@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from lists.models import List, ListViewCount
+
+logger = logging.getLogger(__name__)
+
+# SQLite allows 999 parameters per statement and each When() takes two.
+UPDATE_CHUNK_SIZE = 400
+
+
+def write_view_counts(counts, now=None):
+    now = now or timezone.now()
+    with transaction.atomic():
+        existing = set(ListViewCount.objects.filter(list_id__in=counts).values_list("list_id", flat=True))
+        list_ids = sorted(existing)
+        for start in range(0, len(list_ids), UPDATE_CHUNK_SIZE):
+            chunk = list_ids[start:start + UPDATE_CHUNK_SIZE]
+            delta = Case(*[When(list_id=list_id, then=Value(counts[list_id])) for list_id in chunk],
+                         default=Value(0), output_field=IntegerField())
+            ListViewCount.objects.filter(list_id__in=chunk).update(views=F("views") + delta, last_viewed_at=now)
+        new = List.objects.filter(pk__in=set(counts) - existing).values_list("pk", flat=True)
+        ListViewCount.objects.bulk_create(
+            ListViewCount(list_id=list_id, views=counts[list_id], last_viewed_at=now) for list_id in new
+        )
+
+
+# Counts list views in memory and writes the aggregated deltas every few
+# seconds from a background thread, so a page view costs a dict increment
+# instead of a write. A crash loses at most one interval of counts; a
+# graceful worker exit flushes them (see deploy_tools/gunicorn.conf.py).
+class ViewCounter:
+    def __init__(self, interval=None, max_pending=None):
+        self.interval = interval or settings.LIST_VIEW_FLUSH_SECONDS
+        self.max_pending = max_pending or settings.LIST_VIEW_MAX_PENDING
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher = None
+
+    def increment(self, list_id):
+        self._ensure_flusher()
+        with self._lock:
+            self._counts[list_id] += 1
+
+    def _ensure_flusher(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Counts inherited over a fork belong to the parent.
+                self._counts = Counter()
+                self._flusher = threading.Thread(target=self._run, name="list-view-counter", daemon=True)
+                self._flusher.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+            connection.close_if_unusable_or_obsolete()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return
+        for _ in range(2):
+            try:
+                write_view_counts(counts)
+                return
+            except IntegrityError:
+                # Another worker inserted the same new rows first; retry as updates.
+                continue
+            except DatabaseError:
+                logger.exception("Could not write %d list view counts", len(counts))
+                break
+        with self._lock:
+            counts.update(self._counts)
+            self._counts = Counter(dict(counts.most_common(self.max_pending)))
+
+
+def hot_lists(n):
+    return list(ListViewCount.objects.order_by("-views").values_list("list_id", flat=True)[:n])
+
+
+view_counts = ViewCounter()
@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+from django.conf import settings
+
+from lists.models import Item
+from ops import admission
+
+# A stream is closed after this many seconds and the browser's EventSource
+# reconnects (sending Last-Event-ID), so an idle subscriber never pins a
+# worker thread for longer than this.
+EVENT_STREAM_SECONDS = 25
+# Items added by other worker processes don't go through this process'
+# broker, so every open stream also re-checks the database this often.
+EVENT_POLL_SECONDS = 5
+EVENT_RETRY_MILLISECONDS = 1000
+
+
+class _Channel:
+    def __init__(self, lock):
+        self.condition = threading.Condition(lock)
+        self.version = 0
+        self.subscribers = 0
+
+
+class ListEventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def publish(self, list_id):
+        with self._lock:
+            channel = self._channels.get(list_id)
+            if channel is None:
+                return
+            channel.version += 1
+            channel.condition.notify_all()
+
+    def subscribe(self, list_id):
+        with self._lock:
+            channel = self._channels.setdefault(list_id, _Channel(self._lock))
+            channel.subscribers += 1
+            return channel.version
+
+    def unsubscribe(self, list_id):
+        with self._lock:
+            channel = self._channels[list_id]
+            channel.subscribers -= 1
+            if channel.subscribers == 0:
+                del self._channels[list_id]
+
+    def wait(self, list_id, seen_version, timeout):
+        with self._lock:
+            channel = self._channels[list_id]
+            if channel.version == seen_version:
+                channel.condition.wait(timeout)
+            return channel.version
+
+
+broker = ListEventBroker()
+
+
+def publish_new_item(item):
+    broker.publish(item.list_id)
+
+
+def format_item_event(item_id, text):
+    data = json.dumps({"id": item_id, "text": text})
+    return f"id: {item_id}\nevent: item\ndata: {data}\n\n"
+
+
+def stream_new_items(list_id, after_id, duration=None, poll=None):
+    duration = EVENT_STREAM_SECONDS if duration is None else duration
+    poll = EVENT_POLL_SECONDS if poll is None else poll
+    deadline = time.monotonic() + duration
+    version = broker.subscribe(list_id)
+    try:
+        yield f"retry: {EVENT_RETRY_MILLISECONDS}\n\n"
+        while True:
+            new_items = (Item.objects.filter(list_id=list_id, pk__gt=after_id).order_by("pk")
+                         .values_list("pk", "text"))
+            for item_id, text in new_items:
+                after_id = item_id
+                yield format_item_event(item_id, text)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            version = broker.wait(list_id, version, timeout=min(poll, remaining))
+    finally:
+        broker.unsubscribe(list_id)
+
+
+# Each open stream holds one of this worker's request threads, so only a
+# few are allowed at a time (see ops.admission). The slot is given back
+# when the server closes the response, whether the stream ran out or the
+# client went away.
+class EventStream:
+    def __init__(self, items):
+        self._items = items
+        self._closed = False
+
+    def __iter__(self):
+        return self._items
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._items.close()
+            admission.counters.close_stream()
+
+
+def open_stream(list_id, after_id):
+    if not admission.counters.open_stream(settings.LIST_EVENT_STREAMS_PER_WORKER):
+        return None
+    return EventStream(stream_new_items(list_id, after_id))
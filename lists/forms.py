@@ -1,10 +1,17 @@
+from concurrent import futures
+
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 
+from lists import batching, events
 from lists.models import Item, List
 
 EMPTY_ITEM_ERROR     = "You can't have an empty list item"
 DUPLICATE_ITEM_ERROR = "You've already got this in your list"
+TOO_MANY_ITEMS_ERROR = "A new list can start with at most %d items"
+MAX_NEW_LIST_ITEMS   = 200
 
 
 class ItemForm(forms.models.ModelForm):
@@ -30,10 +37,39 @@ class NewListForm(ItemForm):
             return List.create_new(first_item_text=self.cleaned_data["text"])
 
 
+# Starts a list from a textarea, one item per line, saved in one
+# transaction. Blank lines and repeats are dropped.
+class NewMultiItemListForm(NewListForm):
+    class Meta(NewListForm.Meta):
+        widgets = {
+            'text': forms.Textarea(attrs={
+                'placeholder': 'Enter to-do items, one per line',
+                'class'      : 'form-control input-lg',
+                'rows'       : 5,
+            }),
+        }
+
+    def clean_text(self):
+        texts = list(dict.fromkeys(line.strip() for line in self.cleaned_data["text"].splitlines()))
+        texts = [text for text in texts if text]
+        if not texts:
+            raise ValidationError(EMPTY_ITEM_ERROR)
+        if len(texts) > MAX_NEW_LIST_ITEMS:
+            raise ValidationError(TOO_MANY_ITEMS_ERROR % MAX_NEW_LIST_ITEMS)
+        self.item_texts = texts
+        return texts[0]
+
+    def save(self, owner):
+        first, *more = self.item_texts
+        return List.create_new(first_item_text=first, more_item_texts=more,
+                               owner=owner if owner.is_authenticated else None)
+
+
 class ExistingListItemForm(ItemForm):
     def __init__(self, for_list, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.instance.list = for_list
+        self.write_timed_out = False
 
     def validate_unique(self):
         try:
@@ -41,3 +77,21 @@ class ExistingListItemForm(ItemForm):
         except ValidationError as e:
             e.error_dict = {"text": [DUPLICATE_ITEM_ERROR]}
             self._update_errors(e)
+
+    def save(self):
+        try:
+            if settings.LISTS_BATCH_ITEM_WRITES:
+                item = batching.item_writes.save(self.instance)
+            else:
+                with transaction.atomic():
+                    item = super().save()
+        except IntegrityError:
+            self.add_error("text", DUPLICATE_ITEM_ERROR)
+            return None
+        except futures.TimeoutError:
+            # The committer may still write the item; a retry then finds
+            # it as a duplicate rather than adding it twice.
+            self.write_timed_out = True
+            return None
+        events.publish_new_item(item)
+        return item
@@ -0,0 +1,99 @@
+import hashlib
+import zlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from lists.models import IdempotencyClaim
+
+IDEMPOTENCY_KEY_FIELD = "idempotency_key"
+IDEMPOTENCY_KEY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+IN_FLIGHT_SECONDS = 60
+IGNORED_FIELDS = {IDEMPOTENCY_KEY_FIELD, "csrfmiddlewaretoken"}
+
+
+def get_store():
+    return caches[settings.IDEMPOTENCY_CACHE]
+
+
+def store_key(request, key):
+    user = getattr(request, "user", None)
+    owner = user.pk if user is not None and user.is_authenticated else ""
+    return "idempotency:" + hashlib.sha256(f"{request.path}|{owner}|{key}".encode()).hexdigest()
+
+
+def fingerprint(request):
+    fields = sorted((k, v) for k, values in request.POST.lists() if k not in IGNORED_FIELDS for v in values)
+    return hashlib.sha256(repr(fields).encode()).hexdigest()[:16]
+
+
+def compact(response):
+    if isinstance(response, HttpResponseRedirect):
+        return ("redirect", response.url)
+    return ("response", response.status_code, response["Content-Type"], zlib.compress(response.content))
+
+
+def claim(key):
+    # A claim left by a worker that died mid-request is taken over once it
+    # is older than any request could run.
+    cutoff = timezone.now() - timedelta(seconds=IN_FLIGHT_SECONDS)
+    IdempotencyClaim.objects.filter(key=key, claimed_at__lt=cutoff).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyClaim.objects.create(key=key)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release(key):
+    IdempotencyClaim.objects.filter(key=key).delete()
+
+
+def replay(stored):
+    if stored[0] == "redirect":
+        return HttpResponseRedirect(stored[1])
+    _, status, content_type, content = stored
+    return HttpResponse(zlib.decompress(content), status=status, content_type=content_type)
+
+
+# Answers retried POSTs carrying the same Idempotency-Key header (or hidden
+# form field) from a small TTL-bounded cache, without re-running the view.
+# One that arrives while the first is still running, on any worker, finds
+# its key claimed and gets 409.
+def idempotent(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_KEY_HEADER) or request.POST.get(IDEMPOTENCY_KEY_FIELD)
+        if request.method != "POST" or not key:
+            return view(request, *args, **kwargs)
+
+        store = get_store()
+        cache_key = store_key(request, key)
+        request_fingerprint = fingerprint(request)
+        stored = store.get(cache_key)
+        if stored is None:
+            if not claim(cache_key):
+                return HttpResponse("A request with this idempotency key is in progress", status=409)
+            try:
+                # The response is stored before the claim is released, so a
+                # request that finished since the first look is found here.
+                stored = store.get(cache_key)
+                if stored is None:
+                    response = view(request, *args, **kwargs)
+                    if not response.streaming and response.status_code < 500:
+                        store.set(cache_key, (request_fingerprint, compact(response)),
+                                  settings.IDEMPOTENCY_TTL_SECONDS)
+                    return response
+            finally:
+                release(cache_key)
+        stored_fingerprint, stored_response = stored
+        if stored_fingerprint != request_fingerprint:
+            return HttpResponse("This idempotency key was used for a different request", status=422)
+        return replay(stored_response)
+    return wrapper
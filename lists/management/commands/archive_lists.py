@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from lists.archive import archive_inactive_lists, free_bytes
+
+
+class Command(BaseCommand):
+    help = ('Moves the items of lists with no changes or views for a while into compressed archives; '
+            'a list is restored the next time it is opened.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.LIST_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=settings.LIST_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=settings.LIST_ARCHIVE_PAUSE_SECONDS)
+
+    def handle(self, *args, **options):
+        free_before = free_bytes()
+        totals = archive_inactive_lists(options['days'], options['batch_size'], options['pause'])
+        self.stdout.write(
+            f"Archived {totals['lists']} lists ({totals['items']} items): "
+            f"{totals['item_bytes'] / 1024:.1f} KiB of item text in "
+            f"{totals['archive_bytes'] / 1024:.1f} KiB of archives"
+        )
+        if free_before is not None:
+            # Freed pages are reused by later writes; VACUUM would return them to the filesystem.
+            self.stdout.write(f'Freed {(free_bytes() - free_before) / 1024:.1f} KiB of database pages')
@@ -0,0 +1,53 @@
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from lists.batching import ItemWriteQueue
+from lists.models import List, Item
+from superlists.benchmarking import benchmark_database, timer
+
+
+def insert_directly(item):
+    item.save()
+
+
+class Command(BaseCommand):
+    help = 'Compares item insert throughput with and without group-commit batching.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+        parser.add_argument('--items', type=int, default=200, help='inserts per worker')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stdout.write(f'{"workers":>8} {"mode":>8} {"items/s":>10} {"errors":>7}')
+            for workers in options['workers']:
+                for mode in ('direct', 'batched'):
+                    rate, errors = self.run_round(mode, workers, options['items'])
+                    self.stdout.write(f'{workers:>8} {mode:>8} {rate:>10.0f} {errors:>7}')
+
+    def run_round(self, mode, workers, items_per_worker):
+        list_ = List.objects.create()
+        write_queue = ItemWriteQueue()
+        save = write_queue.save if mode == 'batched' else insert_directly
+        errors = []
+
+        def worker(number):
+            try:
+                for i in range(items_per_worker):
+                    try:
+                        save(Item(list=list_, text=f'{mode}-{number}-{i}'))
+                    except DatabaseError as e:
+                        errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+        with timer() as timing:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        inserted = Item.objects.filter(list=list_).count()
+        return inserted / timing['seconds'], len(errors)
@@ -0,0 +1,56 @@
+import gc
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+
+from lists.models import POSITION_GAP, Item, List
+from superlists.benchmarking import benchmark_database, timer
+
+TABLE_TEMPLATES = {
+    'django': '{% for item in rows %}<tr data-item-id="{{ item.pk }}">'
+              '<td>{{ forloop.counter }}: {{ item.text }}</td></tr>{% endfor %}',
+    'jinja2': '{% for item in rows %}<tr data-item-id="{{ item.pk }}">'
+              '<td>{{ loop.index }}: {{ item.text }}</td></tr>{% endfor %}',
+}
+PATHS = {
+    'item_set.all': lambda list_: list_.item_set.all(),
+    'item_rows': lambda list_: list_.item_rows(),
+}
+
+
+# Timed without tracing, then run again under tracemalloc for the peak.
+def measure(function):
+    gc.collect()
+    with timer() as timing:
+        function()
+    gc.collect()
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return timing['seconds'], peak
+
+
+class Command(BaseCommand):
+    help = 'Compares fetching and rendering list rows as Item instances and as lean (pk, text) rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            list_ = List.objects.create()
+            Item.objects.bulk_create(
+                Item(list=list_, text=f'item {n}', position=(n + 1) * POSITION_GAP) for n in range(options['items'])
+            )
+            self.stdout.write(f'{options["items"]} items')
+            self.stdout.write(f'{"step":>14} {"path":>14} {"seconds":>8} {"peak MB":>8}')
+            for path, rows in PATHS.items():
+                seconds, peak = measure(lambda: list(rows(list_)))
+                self.stdout.write(f'{"fetch":>14} {path:>14} {seconds:>8.2f} {peak / 2**20:>8.1f}')
+            for engine, source in TABLE_TEMPLATES.items():
+                template = engines[engine].from_string(source)
+                for path, rows in PATHS.items():
+                    seconds, peak = measure(lambda: template.render({'rows': rows(list_)}))
+                    self.stdout.write(f'{"render " + engine:>14} {path:>14} {seconds:>8.2f} {peak / 2**20:>8.1f}')
@@ -0,0 +1,46 @@
+import statistics
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from lists.forms import ExistingListItemForm
+from lists.models import POSITION_GAP, Item, List
+from superlists.benchmarking import benchmark_database, timer
+
+ENGINES = ('django', 'jinja2')
+
+
+class Command(BaseCommand):
+    help = 'Compares Django and Jinja2 render times for list.html on lists of different sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stdout.write(f'{"items":>8} {"engine":>8} {"median ms":>10} {"ms/1k rows":>11}')
+            for size in options['sizes']:
+                list_ = self.seed(size)
+                for engine in ENGINES:
+                    milliseconds = self.time_render(engine, list_, options['repeat'])
+                    self.stdout.write(f'{size:>8} {engine:>8} {milliseconds:>10.1f} {milliseconds * 1000 / size:>11.2f}')
+
+    def seed(self, size):
+        list_ = List.objects.create()
+        Item.objects.bulk_create(Item(list=list_, text=f'item {n}', position=(n + 1) * POSITION_GAP) for n in range(size))
+        return list_
+
+    def time_render(self, engine, list_, repeat):
+        request = RequestFactory().get(list_.get_absolute_url())
+        request.user = AnonymousUser()
+        template = get_template('list.html', using=engine)
+        timings = []
+        for _ in range(repeat):
+            context = {'list': list_, 'form': ExistingListItemForm(for_list=list_)}
+            with timer() as timing:
+                template.render(context, request)
+            timings.append(timing['seconds'] * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from lists.models import ListViewCount
+
+
+class Command(BaseCommand):
+    help = 'Lists the most viewed lists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"list":>8} {"views":>10}  last viewed')
+        for count in ListViewCount.objects.order_by('-views')[:options['top']]:
+            self.stdout.write(f'{count.list_id:>8} {count.views:>10}  {count.last_viewed_at:%Y-%m-%d %H:%M}')
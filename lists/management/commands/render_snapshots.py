@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from lists.models import List
+from lists.snapshots import renderer
+
+
+class Command(BaseCommand):
+    help = 'Re-renders the static snapshots of all published lists, e.g. after a template change.'
+
+    def handle(self, *args, **options):
+        count = 0
+        for list_id in List.objects.filter(published=True).values_list('pk', flat=True).iterator():
+            renderer.submit(list_id)
+            count += 1
+        renderer.shutdown()
+        self.stdout.write(f'Rendered {count} list snapshots')
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 07:03
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def log_existing_items(apps, schema_editor):
+    Item = apps.get_model('lists', 'Item')
+    ItemChange = apps.get_model('lists', 'ItemChange')
+    changes = (
+        ItemChange(list_id=list_id, item_id=item_id, kind='insert', text=text)
+        for item_id, list_id, text in Item.objects.order_by('pk').values_list('pk', 'list_id', 'text').iterator()
+    )
+    ItemChange.objects.bulk_create(changes, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0004_auto_20200915_0038'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.IntegerField()),
+                ('kind', models.CharField(choices=[('insert', 'insert'), ('delete', 'delete')], max_length=6)),
+                ('text', models.TextField(blank=True, default='')),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='lists.List')),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.RunPython(log_existing_items, migrations.RunPython.noop),
+    ]
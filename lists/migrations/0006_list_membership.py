@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 07:04
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def index_existing_lists(apps, schema_editor):
+    List = apps.get_model('lists', 'List')
+    Item = apps.get_model('lists', 'Item')
+    ListMembership = apps.get_model('lists', 'ListMembership')
+    SharedWith = List.shared_with.through
+    memberships = []
+    for list_ in List.objects.order_by('pk').iterator():
+        display_name = Item.objects.filter(list=list_).order_by('pk').values_list('text', flat=True).first() or ''
+        if list_.owner_id:
+            memberships.append(ListMembership(user_id=list_.owner_id, list=list_, role='owner',
+                                              display_name=display_name))
+        for user_id in SharedWith.objects.filter(list=list_).values_list('user_id', flat=True):
+            memberships.append(ListMembership(user_id=user_id, list=list_, role='sharee',
+                                              display_name=display_name))
+    ListMembership.objects.bulk_create(memberships, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lists', '0005_item_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListMembership',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'owner'), ('sharee', 'sharee')], max_length=6)),
+                ('display_name', models.TextField(default='')),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='lists.List')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='list_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_activity', '-pk'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='listmembership',
+            unique_together=set([('user', 'list')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='listmembership',
+            index_together=set([('user', 'last_activity')]),
+        ),
+        migrations.RunPython(index_existing_lists, migrations.RunPython.noop),
+    ]
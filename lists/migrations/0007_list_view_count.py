@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 07:18
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0006_list_membership'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListViewCount',
+            fields=[
+                ('list', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='view_count', serialize=False, to='lists.List')),
+                ('views', models.PositiveIntegerField(db_index=True, default=0)),
+                ('last_viewed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-views'],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.db.models import F
+
+POSITION_GAP = 2 ** 16
+
+
+def space_existing_items(apps, schema_editor):
+    Item = apps.get_model('lists', 'Item')
+    Item.objects.update(position=F('pk') * POSITION_GAP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0007_list_view_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='position',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(space_existing_items, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='item',
+            name='position',
+            field=models.BigIntegerField(blank=True),
+        ),
+        migrations.AlterModelOptions(
+            name='item',
+            options={'ordering': ['position', 'pk']},
+        ),
+        migrations.AlterIndexTogether(
+            name='item',
+            index_together=set([('list', 'position')]),
+        ),
+        migrations.AddField(
+            model_name='itemchange',
+            name='after_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='itemchange',
+            name='kind',
+            field=models.CharField(choices=[('insert', 'insert'), ('delete', 'delete'), ('move', 'move')], max_length=6),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-19 07:42
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lists', '0009_list_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='published',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,12 +1,26 @@
-from django.db import models
+from datetime import datetime, timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.urls import reverse
+from django.utils import timezone
 
+from lists import snapshots
 from superlists import settings
 
+ITEM_ROWS_CHUNK_SIZE = 2000
+# Items are spaced this far apart, so a move can take the midpoint between
+# its new neighbours; about 16 moves into the same spot before a rebalance.
+POSITION_GAP = 2 ** 16
+REBALANCE_CHUNK_SIZE = 400
+
 
 class List(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, blank=True, null=True, related_name="ownership")
     shared_with = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name="shared_with")
+    archived = models.BooleanField(default=False)
+    published = models.BooleanField(default=False)
 
     @property
     def name(self):
@@ -15,20 +29,275 @@ class List(models.Model):
     def get_absolute_url(self):
         return reverse("view_list", args=[self.id])
 
+    def item_rows(self, chunk_size=ITEM_ROWS_CHUNK_SIZE):
+        # Streams (pk, text) in keyset-paginated chunks instead of building
+        # an Item instance per row; enough for rendering the list table.
+        items = Item.objects.filter(list_id=self.id)
+        chunk = items
+        while True:
+            chunk = list(chunk.values_list("pk", "text", "position")[:chunk_size])
+            for pk, text, _ in chunk:
+                yield ItemRow(pk, text)
+            if len(chunk) < chunk_size:
+                return
+            last_pk, _, last_position = chunk[-1]
+            chunk = items.filter(position__gte=last_position).exclude(position=last_position, pk__lte=last_pk)
+
+    def rebalance_positions(self):
+        pks = list(Item.objects.filter(list_id=self.id).values_list("pk", flat=True))
+        with transaction.atomic():
+            for start in range(0, len(pks), REBALANCE_CHUNK_SIZE):
+                chunk = pks[start:start + REBALANCE_CHUNK_SIZE]
+                Item.objects.filter(pk__in=chunk).update(position=Case(
+                    *[When(pk=pk, then=Value((start + n + 1) * POSITION_GAP)) for n, pk in enumerate(chunk)],
+                    output_field=IntegerField(),
+                ))
+
     @staticmethod
-    def create_new(first_item_text, owner=None):
-        list_ = List.objects.create(owner=owner)
-        Item.objects.create(text=first_item_text, list=list_)
+    def create_new(first_item_text, owner=None, more_item_texts=()):
+        # One transaction (one commit) for the list, all of its items in a
+        # single INSERT, and their change log; bulk_create sends no
+        # post_save, so the insert changes are written here.
+        texts = [first_item_text, *more_item_texts]
+        with transaction.atomic():
+            list_ = List.objects.create(owner=owner)
+            Item.objects.bulk_create(
+                Item(list=list_, text=text, position=(n + 1) * POSITION_GAP) for n, text in enumerate(texts)
+            )
+            ItemChange.objects.bulk_create(
+                ItemChange(list=list_, item_id=item_id, kind=ItemChange.INSERT, text=text)
+                for item_id, text in list_.item_set.order_by("pk").values_list("pk", "text")
+            )
+            if owner is not None:
+                ListMembership.objects.create(user=owner, list=list_, role=ListMembership.OWNER,
+                                              display_name=first_item_text)
         return list_
 
 
+def last_position(list_id):
+    return (Item.objects.filter(list_id=list_id).order_by("-position")
+            .values_list("position", flat=True).first()) or 0
+
+
+class ItemQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # position is NOT NULL and bulk_create skips Item.save(), so items
+        # without one are appended to their list here the same way.
+        objs = list(objs)
+        last = {}
+        for item in objs:
+            if item.position is None:
+                if item.list_id not in last:
+                    last[item.list_id] = max([last_position(item.list_id)] + [
+                        other.position for other in objs
+                        if other.list_id == item.list_id and other.position is not None
+                    ])
+                last[item.list_id] += POSITION_GAP
+                item.position = last[item.list_id]
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class Item(models.Model):
     text = models.TextField(default="")
     list = models.ForeignKey(List, default=None)
+    position = models.BigIntegerField(blank=True)
+
+    objects = ItemQuerySet.as_manager()
 
     class Meta:
         unique_together = ("list", "text")
-        ordering = ['pk']
+        index_together = [("list", "position")]
+        ordering = ['position', 'pk']
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        if self.position is None:
+            self.position = last_position(self.list_id) + POSITION_GAP
+        super().save(*args, **kwargs)
+
+    def position_after(self, after):
+        # Between `after` (None for the top) and the item now following it;
+        # None when those two have no gap left between them.
+        siblings = Item.objects.filter(list_id=self.list_id).exclude(pk=self.pk)
+        if after is not None:
+            after.refresh_from_db(fields=["position"])
+            siblings = siblings.filter(position__gte=after.position).exclude(position=after.position, pk__lte=after.pk)
+        following = siblings.values_list("position", flat=True).first()
+        if after is None:
+            return self.position if following is None else following - POSITION_GAP
+        if following is None:
+            return after.position + POSITION_GAP
+        if following - after.position > 1:
+            return (after.position + following) // 2
+        return None
+
+    def move_after(self, after):
+        # Writes only this row, unless the new neighbours have run out of
+        # gap; then the list is respaced once first.
+        with transaction.atomic():
+            position = self.position_after(after)
+            if position is None:
+                self.list.rebalance_positions()
+                position = self.position_after(after)
+            Item.objects.filter(pk=self.pk).update(position=position)
+            self.position = position
+            ItemChange.objects.create(list_id=self.list_id, item_id=self.pk, kind=ItemChange.MOVE,
+                                      after_id=after.pk if after is not None else None)
+
+
+class ItemRow:
+    __slots__ = ("pk", "text")
+
+    def __init__(self, pk, text):
+        self.pk = pk
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+
+class ItemChange(models.Model):
+    INSERT = "insert"
+    DELETE = "delete"
+    MOVE = "move"
+    KINDS = ((INSERT, "insert"), (DELETE, "delete"), (MOVE, "move"))
+
+    list = models.ForeignKey(List, related_name="changes")
+    item_id = models.IntegerField()
+    kind = models.CharField(max_length=6, choices=KINDS)
+    text = models.TextField(blank=True, default="")
+    after_id = models.IntegerField(blank=True, null=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['pk']
+
+    @property
+    def seq(self):
+        return self.pk
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class ListMembership(models.Model):
+    OWNER = "owner"
+    SHAREE = "sharee"
+    ROLES = ((OWNER, "owner"), (SHAREE, "sharee"))
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="list_memberships")
+    list = models.ForeignKey(List, related_name="memberships")
+    role = models.CharField(max_length=6, choices=ROLES)
+    display_name = models.TextField(default="")
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ("user", "list")
+        index_together = [("user", "last_activity")]
+        ordering = ['-last_activity', '-pk']
+
+    @property
+    def cursor(self):
+        micros = (self.last_activity - EPOCH) // timedelta(microseconds=1)
+        return f"{micros}_{self.pk}"
+
+    @staticmethod
+    def for_user(user, before=None):
+        memberships = ListMembership.objects.filter(user=user)
+        if before:
+            micros, pk = (int(part) for part in before.split("_"))
+            last_activity = EPOCH + timedelta(microseconds=micros)
+            memberships = memberships.filter(
+                Q(last_activity__lt=last_activity) | Q(last_activity=last_activity, pk__lt=pk)
+            )
+        return memberships
+
+    @staticmethod
+    def page_for_user(user, before=None, size=50):
+        page = list(ListMembership.for_user(user, before)[:size + 1])
+        next_cursor = page[size - 1].cursor if len(page) > size else None
+        return page[:size], next_cursor
+
+
+class ListViewCount(models.Model):
+    list = models.OneToOneField(List, primary_key=True, related_name="view_count")
+    views = models.PositiveIntegerField(default=0, db_index=True)
+    last_viewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-views']
+
+    def __str__(self):
+        return f"list {self.list_id}: {self.views} views"
+
+
+# The items of a list nobody has touched for a while, moved out of the hot
+# lists_item table as one zlib-compressed JSON array of [pk, text, position].
+class ListArchive(models.Model):
+    list = models.OneToOneField(List, primary_key=True, related_name="archive")
+    item_count = models.PositiveIntegerField()
+    payload = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"list {self.list_id}: {self.item_count} items in {len(self.payload)} bytes"
+
+
+# An idempotency key whose request is being handled (lists.idempotency).
+# The unique key makes claiming one a single atomic INSERT for all workers.
+class IdempotencyClaim(models.Model):
+    key = models.CharField(max_length=100, unique=True)
+    claimed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.key
+
+
+def record_item_insert(sender, instance, created, **kwargs):
+    if created:
+        ItemChange.objects.create(list_id=instance.list_id, item_id=instance.pk, kind=ItemChange.INSERT,
+                                  text=instance.text)
+
+
+def record_item_delete(sender, instance, **kwargs):
+    ItemChange.objects.create(list_id=instance.list_id, item_id=instance.pk, kind=ItemChange.DELETE)
+
+
+def refresh_snapshot(sender, instance, created, **kwargs):
+    # Every insert, delete and move of an item logs an ItemChange.
+    if created and List.objects.filter(pk=instance.list_id, published=True).exists():
+        snapshots.renderer.list_changed(instance.list_id)
+
+
+def touch_memberships(sender, instance, created, **kwargs):
+    if created:
+        ListMembership.objects.filter(list_id=instance.list_id).update(last_activity=timezone.now())
+
+
+def sync_sharee_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        pairs = [(instance.pk, list_id) for list_id in pk_set or ()]
+    else:
+        pairs = [(user_id, instance.pk) for user_id in pk_set or ()]
+    if action == "post_add":
+        for user_id, list_id in pairs:
+            first_item_text = Item.objects.filter(list_id=list_id).values_list("text", flat=True).first()
+            ListMembership.objects.get_or_create(
+                user_id=user_id, list_id=list_id,
+                defaults={"role": ListMembership.SHAREE, "display_name": first_item_text or ""},
+            )
+    elif action == "post_remove":
+        for user_id, list_id in pairs:
+            ListMembership.objects.filter(user_id=user_id, list_id=list_id, role=ListMembership.SHAREE).delete()
+    elif action == "pre_clear":
+        lookup = {"user": instance} if reverse else {"list": instance}
+        ListMembership.objects.filter(role=ListMembership.SHAREE, **lookup).delete()
+
+
+post_save.connect(record_item_insert, sender=Item)
+post_save.connect(touch_memberships, sender=Item)
+post_delete.connect(record_item_delete, sender=Item)
+post_save.connect(refresh_snapshot, sender=ItemChange)
+m2m_changed.connect(sync_sharee_memberships, sender=List.shared_with.through)
@@ -0,0 +1,131 @@
+import gzip
+import logging
+import multiprocessing
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def snapshot_path(list_id):
+    return os.path.join(settings.LIST_SNAPSHOT_DIR, f"{list_id}.html")
+
+
+def write_atomically(path, content):
+    partial = f"{path}.{os.getpid()}.partial"
+    with open(partial, "wb") as f:
+        f.write(content)
+    os.replace(partial, path)
+
+
+def remove_snapshot(list_id):
+    path = snapshot_path(list_id)
+    for name in (path, *(path + suffix for suffix in COMPRESSED_SUFFIXES)):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+def write_snapshot(list_id):
+    # The compressed copies are written first: nginx checks for the plain
+    # file, so it never serves a new page next to an old .gz.
+    from lists.models import List
+    list_ = List.objects.filter(pk=list_id, published=True).first()
+    if list_ is None:
+        remove_snapshot(list_id)
+        return None
+    os.makedirs(settings.LIST_SNAPSHOT_DIR, exist_ok=True)
+    html = render_to_string("list_snapshot.html", {"list": list_, "rows": list_.item_rows()}).encode()
+    path = snapshot_path(list_id)
+    write_atomically(path + ".gz", gzip.compress(html, 9))
+    if brotli is not None:
+        write_atomically(path + ".br", brotli.compress(html))
+    write_atomically(path, html)
+    return path
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def render_in_worker(list_id):
+    from django.db import connection
+    try:
+        return write_snapshot(list_id)
+    finally:
+        connection.close()
+
+
+# Renders snapshots of published lists in a small pool of processes, so a
+# change to a list doesn't wait for (or share the GIL with) its re-render.
+# Workers are spawned rather than forked from a multi-threaded gunicorn
+# worker. Renders are queued after commit; a list that changes again while
+# its render is in flight is rendered once more when that one finishes.
+# With LIST_SNAPSHOT_WORKERS = 0 they happen inline instead.
+class SnapshotRenderer:
+    def __init__(self, workers=None):
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._pid = None
+        self._pool = None
+        self._in_flight = set()
+        self._changed_again = set()
+
+    @property
+    def workers(self):
+        return settings.LIST_SNAPSHOT_WORKERS if self._workers is None else self._workers
+
+    def _get_pool(self):
+        if self._pid != os.getpid():
+            self._pool = multiprocessing.get_context("spawn").Pool(self.workers, initializer=init_worker)
+            self._in_flight, self._changed_again = set(), set()
+            self._pid = os.getpid()
+        return self._pool
+
+    def submit(self, list_id):
+        if not self.workers:
+            write_snapshot(list_id)
+            return
+        with self._lock:
+            if list_id in self._in_flight:
+                self._changed_again.add(list_id)
+                return
+            self._in_flight.add(list_id)
+            self._get_pool().apply_async(
+                render_in_worker, (list_id,),
+                callback=lambda _: self._finished(list_id),
+                error_callback=lambda error: self._finished(list_id, error),
+            )
+
+    def _finished(self, list_id, error=None):
+        if error is not None:
+            logger.error("Could not render snapshot of list %s: %r", list_id, error)
+        with self._lock:
+            self._in_flight.discard(list_id)
+            again = list_id in self._changed_again
+            self._changed_again.discard(list_id)
+        if again:
+            self.submit(list_id)
+
+    def list_changed(self, list_id):
+        transaction.on_commit(lambda: self.submit(list_id))
+
+    def shutdown(self):
+        if self._pid == os.getpid():
+            self._pool.close()
+            self._pool.join()
+            self._pid = None
+
+
+renderer = SnapshotRenderer()
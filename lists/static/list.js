@@ -1,8 +1,44 @@
 window.Superlists = {};
 
+const CHANGES_POLL_MILLISECONDS = 5000;
+
 window.Superlists.initialize = function () {
     const events_that_hide = ["click", "keypress"]
     events_that_hide.forEach(event => hideErrorMessageOnEvent(event));
+    listenForNewItems();
+    submitNewItemsInBackground();
+};
+
+window.Superlists.appendItemRow = function (item) {
+    const table = document.getElementById("id_list_table");
+    if (table.querySelector(`tr[data-item-id="${item.id}"]`)) {
+        return;
+    }
+    const row = document.createElement("tr");
+    row.dataset.itemId = item.id;
+    const cell = document.createElement("td");
+    cell.textContent = `${table.rows.length + 1}: ${item.text}`;
+    row.appendChild(cell);
+    table.tBodies.length ? table.tBodies[0].appendChild(row) : table.appendChild(row);
+};
+
+window.Superlists.showItemError = function (form, message) {
+    let error_element = form.querySelector('.has-error');
+    if (!error_element) {
+        error_element = document.createElement("div");
+        error_element.className = "form-group has-error";
+        error_element.appendChild(document.createElement("div")).className = "help-block";
+        form.appendChild(error_element);
+    }
+    error_element.querySelector('.help-block').textContent = message;
+    error_element.style.display = "";
+};
+
+window.Superlists.renewIdempotencyKey = function (form) {
+    const key_input = form.querySelector('input[name="idempotency_key"]');
+    if (key_input) {
+        key_input.value = Date.now().toString(16) + Math.random().toString(16).slice(2);
+    }
 };
 
 function hide_error_message() {
@@ -15,3 +51,77 @@ function hideErrorMessageOnEvent(event) {
         .addEventListener(event, hide_error_message);
 }
 
+function lastItemId(table) {
+    const rows = table.querySelectorAll("tr[data-item-id]");
+    return rows.length ? rows[rows.length - 1].dataset.itemId : 0;
+}
+
+function listenForNewItems() {
+    const table = document.getElementById("id_list_table");
+    if (!table || !table.dataset.eventsUrl) {
+        return;
+    }
+    if (!window.EventSource) {
+        pollForChanges(table, 0);
+        return;
+    }
+    const source = new EventSource(`${table.dataset.eventsUrl}?after=${lastItemId(table)}`);
+    source.addEventListener("item", event => {
+        window.Superlists.appendItemRow(JSON.parse(event.data));
+    });
+    // The server answers 204 when this worker has no stream to spare, and
+    // EventSource then gives up for good instead of reconnecting.
+    source.addEventListener("error", () => {
+        if (source.readyState === EventSource.CLOSED) {
+            pollForChanges(table, 0);
+        }
+    });
+}
+
+window.Superlists.applyChanges = function (changes) {
+    changes
+        .filter(change => change.op === "insert")
+        .forEach(change => window.Superlists.appendItemRow({id: change.id, text: change.text}));
+};
+
+function pollForChanges(table, since) {
+    if (!table.dataset.changesUrl || !window.fetch) {
+        return;
+    }
+    fetch(`${table.dataset.changesUrl}?since=${since}`, {credentials: "same-origin"})
+        .then(response => response.json())
+        .then(data => {
+            window.Superlists.applyChanges(data.changes);
+            setTimeout(() => pollForChanges(table, data.next), data.more ? 0 : CHANGES_POLL_MILLISECONDS);
+        })
+        .catch(() => setTimeout(() => pollForChanges(table, since), CHANGES_POLL_MILLISECONDS));
+}
+
+function submitNewItemsInBackground() {
+    const table = document.getElementById("id_list_table");
+    const input = document.querySelectorAll('input[name="text"]')[0];
+    if (!table || !input || !window.fetch) {
+        return;
+    }
+    const form = input.form;
+    form.addEventListener("submit", event => {
+        event.preventDefault();
+        fetch(form.action, {
+            method: "POST",
+            body: new FormData(form),
+            credentials: "same-origin",
+            headers: {"Accept": "application/json", "X-Requested-With": "XMLHttpRequest"},
+        })
+            .then(response => response.json().then(data => ({ok: response.ok, data: data})))
+            .then(result => {
+                window.Superlists.renewIdempotencyKey(form);
+                if (result.ok) {
+                    window.Superlists.appendItemRow(result.data.item);
+                    input.value = "";
+                } else {
+                    window.Superlists.showItemError(form, result.data.errors.text.join(" "));
+                }
+            })
+            .catch(() => form.submit());
+    });
+}
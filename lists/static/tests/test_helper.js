@@ -15,3 +15,7 @@ function triggerEvent(eventType, element) {
 function getInputElement() {
     return document.querySelectorAll('input[name="text"]')[0];
 }
+
+function getListTableRows() {
+    return document.querySelectorAll('#id_list_table tr');
+}
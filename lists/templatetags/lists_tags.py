@@ -0,0 +1,13 @@
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from lists.idempotency import IDEMPOTENCY_KEY_FIELD
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key_field():
+    return format_html('<input type="hidden" name="{}" value="{}">', IDEMPOTENCY_KEY_FIELD, uuid.uuid4().hex)
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from lists.archive import archive_inactive_lists, archive_list, rehydrate
+from lists.models import Item, ItemChange, List, ListArchive, ListViewCount
+from lists.tests.base import DjangoTestCase
+
+
+def later(days):
+    return timezone.now() + timedelta(days=days)
+
+
+class ArchiveListTest(TestCase):
+    def test_moves_items_into_a_compressed_archive(self):
+        list_ = List.create_new(first_item_text="milk", more_item_texts=["eggs " * 50, "bread"])
+
+        totals = archive_list(list_.id)
+
+        self.assertEqual(Item.objects.count(), 0)
+        archive = ListArchive.objects.get()
+        self.assertEqual((archive.list, archive.item_count), (list_, 3))
+        self.assertTrue(List.objects.get().archived)
+        self.assertEqual((totals["lists"], totals["items"]), (1, 3))
+        self.assertLess(totals["archive_bytes"], totals["item_bytes"])
+
+    def test_doesnt_log_archived_items_as_deleted(self):
+        list_ = List.create_new(first_item_text="milk")
+        archive_list(list_.id)
+        self.assertFalse(ItemChange.objects.filter(kind=ItemChange.DELETE).exists())
+
+    def test_skips_lists_without_items(self):
+        list_ = List.objects.create()
+        self.assertIsNone(archive_list(list_.id))
+        self.assertFalse(List.objects.get().archived)
+        self.assertFalse(ListArchive.objects.exists())
+
+    def test_rehydrate_restores_items_with_their_pks_and_order(self):
+        list_ = List.create_new(first_item_text="a", more_item_texts=["b", "c"])
+        Item.objects.get(text="a").move_after(Item.objects.get(text="c"))
+        before = list(list_.item_set.values_list("pk", "text", "position"))
+        changes = ItemChange.objects.count()
+        archive_list(list_.id)
+
+        rehydrate(list_)
+
+        self.assertEqual(list(list_.item_set.values_list("pk", "text", "position")), before)
+        self.assertFalse(list_.archived)
+        self.assertFalse(List.objects.get().archived)
+        self.assertFalse(ListArchive.objects.exists())
+        self.assertEqual(ItemChange.objects.count(), changes)
+
+    def test_rehydrating_twice_restores_items_once(self):
+        list_ = List.create_new(first_item_text="a")
+        archive_list(list_.id)
+        stale = List.objects.get()
+        rehydrate(list_)
+        rehydrate(stale)
+        self.assertEqual(Item.objects.count(), 1)
+
+
+class ArchiveInactiveListsTest(TestCase):
+    def test_archives_only_lists_without_recent_changes_or_views(self):
+        idle = List.create_new(first_item_text="idle")
+        viewed = List.create_new(first_item_text="viewed")
+        changed = List.create_new(first_item_text="changed")
+        ListViewCount.objects.create(list=viewed, views=1, last_viewed_at=later(25))
+        ItemChange.objects.filter(list=changed).update(changed_at=later(25))
+
+        totals = archive_inactive_lists(days=10, batch_size=2, pause_seconds=0, now=later(30))
+
+        self.assertEqual(totals["lists"], 1)
+        self.assertEqual(list(List.objects.filter(archived=True)), [idle])
+        self.assertEqual(set(Item.objects.values_list("text", flat=True)), {"viewed", "changed"})
+
+    def test_recently_active_lists_are_left_alone(self):
+        List.create_new(first_item_text="fresh")
+        totals = archive_inactive_lists(days=10, batch_size=10, pause_seconds=0)
+        self.assertEqual(totals["lists"], 0)
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_command_reports_reclaimed_space(self):
+        List.create_new(first_item_text="old")
+        out = StringIO()
+        call_command("archive_lists", days=-1, pause=0, stdout=out)
+        self.assertIn("Archived 1 lists (1 items)", out.getvalue())
+        self.assertIn("database pages", out.getvalue())
+
+
+class ArchivedListViewTest(DjangoTestCase):
+    def test_view_list_rehydrates_archived_list(self):
+        list_ = List.create_new(first_item_text="milk", more_item_texts=["eggs"])
+        archive_list(list_.id)
+
+        response = self.client.get(f"/lists/{list_.id}/")
+
+        self.assertContains(response, "milk")
+        self.assertContains(response, "eggs")
+        self.assertFalse(List.objects.get().archived)
+
+    def test_moving_an_item_rehydrates_archived_list(self):
+        list_ = List.create_new(first_item_text="milk", more_item_texts=["eggs"])
+        milk, eggs = list_.item_set.all()
+        archive_list(list_.id)
+
+        response = self.client.post(f"/lists/{list_.id}/items/{milk.pk}/move", data={"after": eggs.pk})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row.text for row in list_.item_rows()], ["eggs", "milk"])
+
+    def test_event_stream_of_archived_list_doesnt_replay_restored_items(self):
+        list_ = List.create_new(first_item_text="milk", more_item_texts=["eggs"])
+        archive_list(list_.id)
+
+        with patch("lists.events.EVENT_STREAM_SECONDS", 0):
+            response = self.client.get(f"/lists/{list_.id}/events")
+            content = b"".join(response.streaming_content).decode()
+
+        self.assertNotIn("milk", content)
+        self.assertFalse(List.objects.get().archived)
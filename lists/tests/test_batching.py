@@ -0,0 +1,53 @@
+from concurrent.futures import Future
+
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase
+
+from lists.batching import ItemWriteQueue
+from lists.models import List, Item
+
+
+def pending(item):
+    return item, Future()
+
+
+class ItemWriteQueueFlushTest(TestCase):
+    def test_flush_saves_every_item_in_batch(self):
+        list_ = List.objects.create()
+        batch = [pending(Item(list=list_, text="a")), pending(Item(list=list_, text="b"))]
+
+        ItemWriteQueue().flush(batch)
+
+        self.assertEqual([item.text for item in Item.objects.all()], ["a", "b"])
+        self.assertEqual([future.result().text for _, future in batch], ["a", "b"])
+
+    def test_duplicate_only_fails_its_own_future(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="dup")
+        duplicate, fresh = pending(Item(list=list_, text="dup")), pending(Item(list=list_, text="fresh"))
+
+        ItemWriteQueue().flush([duplicate, fresh])
+
+        self.assertIsInstance(duplicate[1].exception(), IntegrityError)
+        self.assertEqual(fresh[1].result().text, "fresh")
+        self.assertEqual(Item.objects.count(), 2)
+
+    def test_duplicates_within_one_batch_are_detected(self):
+        list_ = List.objects.create()
+        first, second = pending(Item(list=list_, text="same")), pending(Item(list=list_, text="same"))
+
+        ItemWriteQueue().flush([first, second])
+
+        self.assertEqual(first[1].result().text, "same")
+        self.assertIsInstance(second[1].exception(), IntegrityError)
+
+
+class ItemWriteQueueCommitterTest(TransactionTestCase):
+    def test_submitted_items_are_committed_by_background_thread(self):
+        list_ = List.objects.create()
+        writes = ItemWriteQueue(interval=0.001)
+
+        futures = [writes.submit(Item(list=list_, text=str(i))) for i in range(5)]
+
+        self.assertEqual(sorted(f.result(timeout=5).text for f in futures), ["0", "1", "2", "3", "4"])
+        self.assertEqual(Item.objects.filter(list=list_).count(), 5)
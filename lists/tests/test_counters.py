@@ -0,0 +1,70 @@
+from collections import Counter
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase
+
+from lists.counters import ViewCounter, hot_lists, write_view_counts
+from lists.models import List, ListViewCount
+
+
+class WriteViewCountsTest(TestCase):
+    def test_creates_rows_for_new_lists(self):
+        list_ = List.objects.create()
+        write_view_counts(Counter({list_.id: 3}))
+        self.assertEqual(ListViewCount.objects.get(list=list_).views, 3)
+
+    def test_adds_deltas_to_existing_rows_in_one_update(self):
+        first, second = List.objects.create(), List.objects.create()
+        write_view_counts(Counter({first.id: 1, second.id: 1}))
+
+        with self.assertNumQueries(4):
+            write_view_counts(Counter({first.id: 4, second.id: 2}))
+
+        self.assertEqual(ListViewCount.objects.get(list=first).views, 5)
+        self.assertEqual(ListViewCount.objects.get(list=second).views, 3)
+
+    def test_ignores_deleted_lists(self):
+        list_ = List.objects.create()
+        write_view_counts(Counter({list_.id: 1, list_.id + 1: 7}))
+        self.assertEqual(list(ListViewCount.objects.values_list("list_id", flat=True)), [list_.id])
+
+
+class ViewCounterTest(TestCase):
+    def test_flush_writes_aggregated_counts(self):
+        list_ = List.objects.create()
+        counter = ViewCounter(interval=3600)
+        for _ in range(5):
+            counter.increment(list_.id)
+
+        counter.flush()
+
+        self.assertEqual(ListViewCount.objects.get(list=list_).views, 5)
+
+    def test_failed_flush_keeps_counts_for_next_time(self):
+        list_ = List.objects.create()
+        counter = ViewCounter(interval=3600)
+        counter.increment(list_.id)
+        with patch("lists.counters.write_view_counts", side_effect=OperationalError("locked")):
+            counter.flush()
+        counter.increment(list_.id)
+
+        counter.flush()
+
+        self.assertEqual(ListViewCount.objects.get(list=list_).views, 2)
+
+    def test_kept_counts_are_bounded(self):
+        counter = ViewCounter(interval=3600, max_pending=2)
+        for list_id, views in ((1, 5), (2, 1), (3, 9)):
+            for _ in range(views):
+                counter.increment(list_id)
+        with patch("lists.counters.write_view_counts", side_effect=OperationalError("locked")):
+            counter.flush()
+        self.assertEqual(counter._counts, Counter({3: 9, 1: 5}))
+
+
+class HotListsTest(TestCase):
+    def test_returns_most_viewed_lists_first(self):
+        quiet, busy, medium = List.objects.create(), List.objects.create(), List.objects.create()
+        write_view_counts(Counter({quiet.id: 1, busy.id: 50, medium.id: 10}))
+        self.assertEqual(hot_lists(2), [busy.id, medium.id])
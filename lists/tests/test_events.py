@@ -0,0 +1,78 @@
+import threading
+import unittest
+
+from django.test import TestCase
+
+from lists import events
+from lists.events import ListEventBroker, format_item_event, stream_new_items
+from lists.models import List, Item
+
+
+class ListEventBrokerTest(unittest.TestCase):
+    def test_wait_returns_immediately_if_version_already_changed(self):
+        broker = ListEventBroker()
+        seen = broker.subscribe(1)
+        broker.publish(1)
+        self.assertEqual(broker.wait(1, seen, timeout=5), seen + 1)
+
+    def test_wait_times_out_without_events(self):
+        broker = ListEventBroker()
+        seen = broker.subscribe(1)
+        self.assertEqual(broker.wait(1, seen, timeout=0.01), seen)
+
+    def test_publish_wakes_waiting_subscriber(self):
+        broker = ListEventBroker()
+        seen = broker.subscribe(1)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(broker.wait(1, seen, timeout=5)))
+        waiter.start()
+        broker.publish(1)
+        waiter.join(timeout=5)
+        self.assertEqual(results, [seen + 1])
+
+    def test_publish_to_other_list_doesnt_change_version(self):
+        broker = ListEventBroker()
+        seen = broker.subscribe(1)
+        broker.subscribe(2)
+        broker.publish(2)
+        self.assertEqual(broker.wait(1, seen, timeout=0.01), seen)
+
+    def test_channel_is_dropped_after_last_unsubscribe(self):
+        broker = ListEventBroker()
+        broker.subscribe(1)
+        broker.subscribe(1)
+        broker.unsubscribe(1)
+        self.assertIn(1, broker._channels)
+        broker.unsubscribe(1)
+        self.assertNotIn(1, broker._channels)
+
+    def test_publish_without_subscribers_is_a_noop(self):
+        ListEventBroker().publish(1)  # should not raise
+
+
+class StreamNewItemsTest(TestCase):
+    def test_starts_with_retry_interval(self):
+        list_ = List.objects.create()
+        chunks = list(stream_new_items(list_.id, after_id=0, duration=0))
+        self.assertEqual(chunks[0], f"retry: {events.EVENT_RETRY_MILLISECONDS}\n\n")
+
+    def test_streams_only_items_after_given_id(self):
+        list_ = List.objects.create()
+        old_item = Item.objects.create(list=list_, text="old")
+        new_item = Item.objects.create(list=list_, text="new")
+        Item.objects.create(list=List.objects.create(), text="other list")
+
+        chunks = list(stream_new_items(list_.id, after_id=old_item.pk, duration=0))
+
+        self.assertEqual(chunks[1:], [format_item_event(new_item.pk, "new")])
+
+    def test_unsubscribes_when_stream_ends(self):
+        list_ = List.objects.create()
+        list(stream_new_items(list_.id, after_id=0, duration=0))
+        self.assertNotIn(list_.id, events.broker._channels)
+
+    def test_event_format(self):
+        self.assertEqual(
+            format_item_event(3, "milk"),
+            'id: 3\nevent: item\ndata: {"id": 3, "text": "milk"}\n\n'
+        )
@@ -1,9 +1,13 @@
 import unittest
+from concurrent import futures
 from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
 
-from lists.forms import ItemForm, EMPTY_ITEM_ERROR, ExistingListItemForm, DUPLICATE_ITEM_ERROR, NewListForm
+from lists.forms import (
+    ItemForm, EMPTY_ITEM_ERROR, ExistingListItemForm, DUPLICATE_ITEM_ERROR, NewListForm, NewMultiItemListForm,
+)
 from lists.models import List, Item
 
 
@@ -45,6 +49,46 @@ class ExistingListItemFormTest(TestCase):
         new_item = form.save()
         self.assertEqual(new_item, Item.objects.all()[0])
 
+    def test_form_save_reports_duplicate_inserted_after_validation(self):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "racy"})
+        self.assertTrue(form.is_valid())
+        Item.objects.create(list=list_, text="racy")
+
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors["text"], [DUPLICATE_ITEM_ERROR])
+
+    @override_settings(LISTS_BATCH_ITEM_WRITES=True)
+    @patch("lists.forms.batching.item_writes")
+    def test_form_save_hands_item_to_write_queue_when_batching(self, mock_item_writes):
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        form.is_valid()
+        new_item = form.save()
+        mock_item_writes.save.assert_called_once_with(form.instance)
+        self.assertEqual(new_item, mock_item_writes.save.return_value)
+        self.assertEqual(Item.objects.count(), 0)
+
+    @override_settings(LISTS_BATCH_ITEM_WRITES=True)
+    @patch("lists.forms.batching.item_writes")
+    def test_form_save_reports_duplicate_from_write_queue(self, mock_item_writes):
+        mock_item_writes.save.side_effect = IntegrityError
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        form.is_valid()
+        self.assertIsNone(form.save())
+        self.assertEqual(form.errors["text"], [DUPLICATE_ITEM_ERROR])
+
+    @override_settings(LISTS_BATCH_ITEM_WRITES=True)
+    @patch("lists.forms.batching.item_writes")
+    def test_form_save_reports_write_queue_timeout(self, mock_item_writes):
+        mock_item_writes.save.side_effect = futures.TimeoutError
+        list_ = List.objects.create()
+        form = ExistingListItemForm(for_list=list_, data={"text": "hi"})
+        form.is_valid()
+        self.assertIsNone(form.save())
+        self.assertTrue(form.write_timed_out)
+
 
 class NewListFormTest(unittest.TestCase):
     @patch("lists.forms.List.create_new")
@@ -79,3 +123,31 @@ class NewListFormTest(unittest.TestCase):
         response = form.save(owner=user)
         self.assertEqual(response, mock_List_create_new.return_value)
 
+
+class NewMultiItemListFormTest(unittest.TestCase):
+    @patch("lists.forms.List.create_new")
+    def test_save_creates_list_with_one_item_per_line(self, mock_List_create_new):
+        user = Mock(is_authenticated=True)
+        form = NewMultiItemListForm(data={"text": "milk\r\n\r\n  eggs \nmilk\nbread"})
+        self.assertTrue(form.is_valid())
+        form.save(owner=user)
+        mock_List_create_new.assert_called_once_with(
+            first_item_text="milk", more_item_texts=["eggs", "bread"], owner=user
+        )
+
+    @patch("lists.forms.List.create_new")
+    def test_save_without_owner_if_user_not_authenticated(self, mock_List_create_new):
+        form = NewMultiItemListForm(data={"text": "milk"})
+        form.is_valid()
+        form.save(owner=Mock(is_authenticated=False))
+        mock_List_create_new.assert_called_once_with(first_item_text="milk", more_item_texts=[], owner=None)
+
+    def test_form_validation_for_blank_lines(self):
+        form = NewMultiItemListForm(data={"text": "\n  \n"})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors["text"], [EMPTY_ITEM_ERROR])
+
+    @patch("lists.forms.MAX_NEW_LIST_ITEMS", 2)
+    def test_form_validation_for_too_many_items(self):
+        form = NewMultiItemListForm(data={"text": "a\nb\nc"})
+        self.assertFalse(form.is_valid())
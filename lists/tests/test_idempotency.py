@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+from django.utils.html import escape
+
+from lists.forms import EMPTY_ITEM_ERROR
+from lists.idempotency import IN_FLIGHT_SECONDS, claim, release
+from lists.models import IdempotencyClaim, List, Item
+from lists.tests.base import DjangoTestCase
+from lists.views import new_list
+
+
+@override_settings(IDEMPOTENCY_CACHE="default")
+class IdempotentPostTest(DjangoTestCase):
+    def setUp(self):
+        caches["default"].clear()
+
+    def post_new_list(self, text, key="key-1"):
+        return self.client.post("/lists/new", data={"text": text}, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_new_list_doesnt_create_a_second_list(self):
+        first = self.post_new_list("milk")
+        retry = self.post_new_list("milk")
+        self.assertEqual(List.objects.count(), 1)
+        self.assertEqual(retry.status_code, 302)
+        self.assertEqual(retry.url, first.url)
+
+    def test_retry_is_answered_without_running_the_view(self):
+        self.post_new_list("milk")
+        with patch("lists.views.NewListForm") as mock_form:
+            self.post_new_list("milk")
+        self.assertFalse(mock_form.called)
+
+    def test_hidden_form_field_works_like_the_header(self):
+        self.client.post("/lists/new", data={"text": "milk", "idempotency_key": "abc"})
+        self.client.post("/lists/new", data={"text": "milk", "idempotency_key": "abc"})
+        self.assertEqual(List.objects.count(), 1)
+
+    def test_different_keys_are_independent_requests(self):
+        self.post_new_list("milk", key="key-1")
+        self.post_new_list("eggs", key="key-2")
+        self.assertEqual(List.objects.count(), 2)
+
+    def test_posts_without_key_are_not_deduplicated(self):
+        self.client.post("/lists/new", data={"text": "milk"})
+        self.client.post("/lists/new", data={"text": "milk"})
+        self.assertEqual(List.objects.count(), 2)
+
+    def test_retried_validation_error_is_replayed(self):
+        self.post_new_list("")
+        retry = self.post_new_list("")
+        self.assertEqual(retry.status_code, 200)
+        self.assertContains(retry, escape(EMPTY_ITEM_ERROR))
+
+    def test_reused_key_with_different_data_is_rejected(self):
+        self.post_new_list("milk")
+        response = self.post_new_list("eggs")
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(List.objects.count(), 1)
+
+    def test_retried_item_post_doesnt_touch_items(self):
+        list_ = List.objects.create()
+        headers = {"HTTP_IDEMPOTENCY_KEY": "item-key", "HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+        first = self.client.post(f"/lists/{list_.id}/", data={"text": "milk"}, **headers)
+        retry = self.client.post(f"/lists/{list_.id}/", data={"text": "milk"}, **headers)
+        self.assertEqual(Item.objects.count(), 1)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+
+    def test_request_in_progress_with_same_key_is_a_conflict(self):
+        retries = []
+
+        def retry_while_running(*args, **kwargs):
+            retry = RequestFactory().post("/lists/new", data={"text": "milk"}, HTTP_IDEMPOTENCY_KEY="key-1")
+            retry.user = AnonymousUser()
+            retries.append(new_list(retry))
+            return List.objects.create()
+
+        with patch("lists.views.NewListForm") as mock_form:
+            mock_form.return_value.save.side_effect = retry_while_running
+            self.post_new_list("milk")
+
+        self.assertEqual(retries[0].status_code, 409)
+        self.assertEqual(List.objects.count(), 1)
+        self.assertEqual(IdempotencyClaim.objects.count(), 0)
+
+    def test_a_key_can_only_be_claimed_once_at_a_time(self):
+        self.assertTrue(claim("some-key"))
+        self.assertFalse(claim("some-key"))
+        release("some-key")
+        self.assertTrue(claim("some-key"))
+
+    def test_claims_of_dead_requests_are_taken_over(self):
+        claimed_at = timezone.now() - timedelta(seconds=IN_FLIGHT_SECONDS + 1)
+        IdempotencyClaim.objects.create(key="some-key", claimed_at=claimed_at)
+        self.assertTrue(claim("some-key"))
+
+    def test_claim_is_released_when_the_view_fails(self):
+        with patch("lists.views.NewListForm", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post_new_list("milk")
+        self.assertEqual(IdempotencyClaim.objects.count(), 0)
+
+    def test_forms_carry_a_fresh_idempotency_key(self):
+        first = self.get_DOM_for_response(self.client.get("/")).find("input", {"name": "idempotency_key"})
+        second = self.get_DOM_for_response(self.client.get("/")).find("input", {"name": "idempotency_key"})
+        self.assertEqual(first.get("type"), "hidden")
+        self.assertNotEqual(first.get("value"), second.get("value"))
@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError
 from django.test import TestCase
 
-from lists.models import List, Item
+from lists.models import POSITION_GAP, List, Item, ItemChange, ListMembership
 
 User = get_user_model()
 
@@ -82,6 +83,24 @@ class ListModelsTest(TestCase):
         new_list = List.objects.first()
         self.assertEqual(new_list.owner, user)
 
+    def test_create_new_saves_more_items_in_order_with_their_changes(self):
+        list_ = List.create_new(first_item_text="a", more_item_texts=["b", "c"])
+        self.assertEqual([row.text for row in list_.item_rows()], list("abc"))
+        self.assertEqual(list(list_.item_set.values_list("position", flat=True)),
+                         [POSITION_GAP, 2 * POSITION_GAP, 3 * POSITION_GAP])
+        self.assertEqual(list(list_.changes.values_list("item_id", "kind", "text")),
+                         [(pk, ItemChange.INSERT, text) for pk, text in list_.item_set.values_list("pk", "text")])
+
+    def test_create_new_inserts_all_items_at_once(self):
+        # savepoint, list, items, their pks, changes, release
+        with self.assertNumQueries(6):
+            List.create_new(first_item_text="a", more_item_texts=[str(n) for n in range(50)])
+
+    def test_create_new_leaves_nothing_behind_on_failure(self):
+        with self.assertRaises(IntegrityError):
+            List.create_new(first_item_text="a", more_item_texts=["a"])
+        self.assertEqual(List.objects.count(), 0)
+
     def test_list_optional_fields(self):
         try:
             List().full_clean()
@@ -106,3 +125,183 @@ class ListModelsTest(TestCase):
         self.assertIn(shared_1, all_users_shared_with)
         self.assertIn(shared_2, all_users_shared_with)
 
+    def test_item_rows_streams_items_of_list_in_order_across_chunks(self):
+        list_ = List.create_new(first_item_text="a")
+        for text in "bcde":
+            Item.objects.create(list=list_, text=text)
+        Item.objects.create(list=List.objects.create(), text="other")
+
+        rows = list(list_.item_rows(chunk_size=2))
+
+        self.assertEqual([row.text for row in rows], list("abcde"))
+        self.assertEqual([row.pk for row in rows], list(list_.item_set.values_list("pk", flat=True)))
+
+    def test_item_rows_fetches_only_pk_and_text(self):
+        list_ = List.create_new(first_item_text="a")
+        with self.assertNumQueries(1):
+            row, = list_.item_rows()
+        self.assertFalse(hasattr(row, "__dict__"))
+
+
+class ItemPositionTest(TestCase):
+    def make_list(self, texts):
+        list_ = List.create_new(first_item_text=texts[0])
+        for text in texts[1:]:
+            Item.objects.create(list=list_, text=text)
+        return list_
+
+    def texts(self, list_):
+        return [row.text for row in list_.item_rows()]
+
+    def test_new_items_go_to_the_end_a_gap_apart(self):
+        list_ = self.make_list("abc")
+        positions = list(list_.item_set.values_list("position", flat=True))
+        self.assertEqual(positions, [POSITION_GAP, 2 * POSITION_GAP, 3 * POSITION_GAP])
+
+    def test_bulk_created_items_without_position_go_to_the_end(self):
+        list_ = self.make_list("ab")
+        Item.objects.bulk_create([Item(list=list_, text="c"), Item(list=list_, text="d")])
+        positions = list(list_.item_set.values_list("position", flat=True))
+        self.assertEqual(positions, [n * POSITION_GAP for n in range(1, 5)])
+        self.assertEqual(self.texts(list_), list("abcd"))
+
+    def test_move_after_another_item(self):
+        list_ = self.make_list("abcd")
+        Item.objects.get(text="a").move_after(Item.objects.get(text="c"))
+        self.assertEqual(self.texts(list_), list("bcad"))
+
+    def test_move_to_the_top_and_to_the_end(self):
+        list_ = self.make_list("abc")
+        Item.objects.get(text="c").move_after(None)
+        Item.objects.get(text="a").move_after(Item.objects.get(text="b"))
+        self.assertEqual(self.texts(list_), list("cba"))
+
+    def test_move_only_writes_the_moved_item(self):
+        list_ = self.make_list("abcd")
+        before = dict(list_.item_set.values_list("text", "position"))
+        Item.objects.get(text="d").move_after(Item.objects.get(text="a"))
+        after = dict(list_.item_set.values_list("text", "position"))
+        self.assertEqual({text for text in before if before[text] != after[text]}, {"d"})
+
+    def test_rebalances_when_neighbours_have_no_gap_left(self):
+        list_ = self.make_list("abc")
+        Item.objects.filter(text="b").update(position=POSITION_GAP + 1)
+        Item.objects.get(text="c").move_after(Item.objects.get(text="a"))
+        self.assertEqual(self.texts(list_), list("acb"))
+        positions = list(list_.item_set.values_list("position", flat=True))
+        self.assertTrue(all(b - a > 1 for a, b in zip(positions, positions[1:])))
+
+    def test_move_logs_a_change_with_the_new_neighbour(self):
+        list_ = self.make_list("ab")
+        a, b = list_.item_set.all()
+        a.move_after(b)
+        change = ItemChange.objects.last()
+        self.assertEqual((change.kind, change.item_id, change.after_id), (ItemChange.MOVE, a.pk, b.pk))
+
+
+class ItemChangeTest(TestCase):
+    def test_creating_an_item_logs_an_insert(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="milk")
+        change = ItemChange.objects.get()
+        self.assertEqual((change.list, change.item_id, change.kind, change.text),
+                         (list_, item.pk, ItemChange.INSERT, "milk"))
+
+    def test_updating_an_item_doesnt_log_a_change(self):
+        item = Item.objects.create(list=List.objects.create(), text="milk")
+        item.save()
+        self.assertEqual(ItemChange.objects.count(), 1)
+
+    def test_deleting_an_item_logs_a_delete(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="milk")
+        item_id = item.pk
+        item.delete()
+        change = ItemChange.objects.last()
+        self.assertEqual((change.list, change.item_id, change.kind), (list_, item_id, ItemChange.DELETE))
+
+    def test_sequence_increases_across_lists(self):
+        Item.objects.create(list=List.objects.create(), text="a")
+        Item.objects.create(list=List.objects.create(), text="b")
+        first, second = ItemChange.objects.all()
+        self.assertLess(first.seq, second.seq)
+
+
+class ListMembershipTest(TestCase):
+    def test_create_new_indexes_list_for_owner(self):
+        owner = User.objects.create(email="owner@a.com")
+        list_ = List.create_new(first_item_text="groceries", owner=owner)
+        membership = ListMembership.objects.get()
+        self.assertEqual(
+            (membership.user, membership.list, membership.role, membership.display_name),
+            (owner, list_, ListMembership.OWNER, "groceries")
+        )
+
+    def test_create_new_without_owner_isnt_indexed(self):
+        List.create_new(first_item_text="anonymous")
+        self.assertEqual(ListMembership.objects.count(), 0)
+
+    def test_sharing_indexes_list_for_sharee(self):
+        list_ = List.create_new(first_item_text="groceries", owner=User.objects.create(email="owner@a.com"))
+        sharee = User.objects.create(email="sharee@a.com")
+        list_.shared_with.add(sharee)
+        membership = ListMembership.objects.get(user=sharee)
+        self.assertEqual((membership.role, membership.display_name), (ListMembership.SHAREE, "groceries"))
+
+    def test_sharing_from_user_side_indexes_list(self):
+        list_ = List.create_new(first_item_text="groceries")
+        sharee = User.objects.create(email="sharee@a.com")
+        sharee.shared_with.add(list_)
+        self.assertTrue(ListMembership.objects.filter(user=sharee, list=list_).exists())
+
+    def test_unsharing_removes_sharee_from_index(self):
+        list_ = List.create_new(first_item_text="groceries")
+        sharee = User.objects.create(email="sharee@a.com")
+        list_.shared_with.add(sharee)
+        list_.shared_with.remove(sharee)
+        self.assertFalse(ListMembership.objects.filter(user=sharee).exists())
+
+    def test_clearing_sharees_keeps_owner_in_index(self):
+        owner = User.objects.create(email="owner@a.com")
+        list_ = List.create_new(first_item_text="groceries", owner=owner)
+        list_.shared_with.add(User.objects.create(email="sharee@a.com"))
+        list_.shared_with.clear()
+        self.assertEqual(list(ListMembership.objects.values_list("user_id", flat=True)), [owner.email])
+
+    def test_adding_an_item_bumps_last_activity(self):
+        owner = User.objects.create(email="owner@a.com")
+        list_ = List.create_new(first_item_text="groceries", owner=owner)
+        before = ListMembership.objects.get().last_activity
+        Item.objects.create(list=list_, text="milk")
+        self.assertGreater(ListMembership.objects.get().last_activity, before)
+
+    def test_page_is_sorted_by_most_recent_activity(self):
+        owner = User.objects.create(email="owner@a.com")
+        old_list = List.create_new(first_item_text="old", owner=owner)
+        new_list = List.create_new(first_item_text="new", owner=owner)
+        Item.objects.create(list=old_list, text="recent item")
+        page, _ = ListMembership.page_for_user(owner)
+        self.assertEqual([m.list for m in page], [old_list, new_list])
+
+    def test_pages_continue_from_cursor(self):
+        owner = User.objects.create(email="owner@a.com")
+        lists = [List.create_new(first_item_text=f"list {i}", owner=owner) for i in range(5)]
+
+        first_page, cursor = ListMembership.page_for_user(owner, size=2)
+        second_page, cursor = ListMembership.page_for_user(owner, before=cursor, size=2)
+        third_page, cursor = ListMembership.page_for_user(owner, before=cursor, size=2)
+
+        seen = [m.list for m in first_page + second_page + third_page]
+        self.assertEqual(seen, list(reversed(lists)))
+        self.assertIsNone(cursor)
+
+    def test_cursor_breaks_ties_on_same_activity(self):
+        owner = User.objects.create(email="owner@a.com")
+        for i in range(3):
+            List.create_new(first_item_text=f"list {i}", owner=owner)
+        ListMembership.objects.update(last_activity=ListMembership.objects.first().last_activity)
+
+        first_page, cursor = ListMembership.page_for_user(owner, size=2)
+        second_page, _ = ListMembership.page_for_user(owner, before=cursor, size=2)
+
+        self.assertEqual(len({m.pk for m in first_page + second_page}), 3)
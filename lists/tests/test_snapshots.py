@@ -0,0 +1,159 @@
+import gzip
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from lists.archive import archive_inactive_lists
+from lists.models import Item, List
+from lists.snapshots import SnapshotRenderer, snapshot_path, write_snapshot
+from lists.tests.base import DjangoTestCase
+
+User = get_user_model()
+
+
+def run_on_commit_now():
+    return patch("lists.snapshots.transaction.on_commit", side_effect=lambda callback: callback())
+
+
+class SnapshotDirMixin:
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(LIST_SNAPSHOT_DIR=tmp.name, LIST_SNAPSHOT_WORKERS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def read_snapshot(self, list_):
+        with open(snapshot_path(list_.id)) as f:
+            return f.read()
+
+
+class WriteSnapshotTest(SnapshotDirMixin, TestCase):
+    def test_renders_published_list_with_compressed_copy(self):
+        list_ = List.create_new(first_item_text="milk & eggs", more_item_texts=["bread"])
+        List.objects.filter(pk=list_.pk).update(published=True)
+
+        path = write_snapshot(list_.id)
+
+        html = self.read_snapshot(list_)
+        self.assertIn("milk &amp; eggs", html)
+        self.assertIn("2: bread", html)
+        self.assertNotIn("csrfmiddlewaretoken", html)
+        with gzip.open(path + ".gz") as f:
+            self.assertEqual(f.read().decode(), html)
+
+    def test_removes_snapshot_of_unpublished_list(self):
+        list_ = List.create_new(first_item_text="milk")
+        List.objects.filter(pk=list_.pk).update(published=True)
+        write_snapshot(list_.id)
+        List.objects.filter(pk=list_.pk).update(published=False)
+
+        self.assertIsNone(write_snapshot(list_.id))
+
+        self.assertFalse(os.path.exists(snapshot_path(list_.id)))
+        self.assertFalse(os.path.exists(snapshot_path(list_.id) + ".gz"))
+
+    def test_item_changes_re_render_published_lists_after_commit(self):
+        list_ = List.create_new(first_item_text="milk")
+        List.objects.filter(pk=list_.pk).update(published=True)
+        with run_on_commit_now():
+            item = Item.objects.create(list=list_, text="eggs")
+            self.assertIn("eggs", self.read_snapshot(list_))
+            item.move_after(None)
+            self.assertIn("1: eggs", self.read_snapshot(list_))
+            item.delete()
+        self.assertNotIn("eggs", self.read_snapshot(list_))
+
+    def test_changes_to_unpublished_lists_render_nothing(self):
+        list_ = List.create_new(first_item_text="milk")
+        with run_on_commit_now(), patch("lists.snapshots.write_snapshot") as mock_write:
+            Item.objects.create(list=list_, text="eggs")
+        mock_write.assert_not_called()
+
+    def test_published_lists_are_not_archived(self):
+        list_ = List.create_new(first_item_text="milk")
+        List.objects.filter(pk=list_.pk).update(published=True)
+        self.assertEqual(archive_inactive_lists(days=-1, batch_size=10, pause_seconds=0)["lists"], 0)
+
+
+class SnapshotRendererTest(TestCase):
+    def setUp(self):
+        self.renderer = SnapshotRenderer(workers=2)
+        self.pool = Mock()
+        patcher = patch.object(self.renderer, "_get_pool", return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def finish(self, call):
+        call[1]["callback"](None)
+
+    def test_renders_in_the_pool(self):
+        self.renderer.submit(7)
+        self.assertEqual(self.pool.apply_async.call_args[0][1], (7,))
+
+    def test_changes_during_a_render_queue_one_more_render(self):
+        self.renderer.submit(7)
+        self.renderer.submit(7)
+        self.renderer.submit(7)
+        self.assertEqual(self.pool.apply_async.call_count, 1)
+
+        self.finish(self.pool.apply_async.call_args)
+        self.assertEqual(self.pool.apply_async.call_count, 2)
+
+        self.finish(self.pool.apply_async.call_args)
+        self.assertEqual(self.pool.apply_async.call_count, 2)
+
+    def test_failed_render_is_logged_and_doesnt_block_the_list(self):
+        self.renderer.submit(7)
+        with self.assertLogs("lists.snapshots", "ERROR"):
+            self.pool.apply_async.call_args[1]["error_callback"](OSError("disk full"))
+        self.renderer.submit(7)
+        self.assertEqual(self.pool.apply_async.call_count, 2)
+
+
+class PublishListViewTest(SnapshotDirMixin, DjangoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = User.objects.create(email="owner@example.com")
+        self.list_ = List.create_new(first_item_text="milk", owner=self.owner)
+
+    def publish(self, value="on"):
+        with run_on_commit_now():
+            return self.client.post(f"/lists/{self.list_.id}/publish", data={"published": value})
+
+    def test_owner_can_publish_and_unpublish(self):
+        self.client.force_login(self.owner)
+
+        response = self.publish()
+        self.assertRedirects(response, f"/lists/{self.list_.id}/")
+        self.assertTrue(List.objects.get().published)
+        self.assertIn("milk", self.read_snapshot(self.list_))
+
+        self.publish("off")
+        self.assertFalse(List.objects.get().published)
+        self.assertFalse(os.path.exists(snapshot_path(self.list_.id)))
+
+    def test_others_cannot_publish(self):
+        self.assertEqual(self.publish().status_code, 403)
+        self.client.force_login(User.objects.create(email="other@example.com"))
+        self.assertEqual(self.publish().status_code, 403)
+        self.assertFalse(List.objects.get().published)
+
+    def test_owner_sees_publish_button(self):
+        self.client.force_login(self.owner)
+        self.assertContains(self.client.get(f"/lists/{self.list_.id}/"), 'id="form_publish"')
+
+    def test_adding_an_item_to_a_published_list_redirects_past_the_snapshot(self):
+        List.objects.filter(pk=self.list_.pk).update(published=True)
+        with run_on_commit_now():
+            response = self.client.post(f"/lists/{self.list_.id}/?edit", data={"text": "eggs"})
+        self.assertRedirects(response, f"/lists/{self.list_.id}/?edit")
+        self.assertIn("eggs", self.read_snapshot(self.list_))
+
+    def test_adding_an_item_to_an_unpublished_list_redirects_to_the_list(self):
+        response = self.client.post(f"/lists/{self.list_.id}/", data={"text": "eggs"})
+        self.assertRedirects(response, f"/lists/{self.list_.id}/")
@@ -1,8 +1,10 @@
 import unittest
+from concurrent import futures
 from unittest.mock import patch, Mock
 
 from django.contrib.auth import get_user_model
 from django.http import HttpRequest
+from django.test import override_settings
 from django.urls import reverse
 from django.utils.html import escape
 
@@ -162,6 +164,13 @@ class ListViewTest(DjangoTestCase):
         owner_heading = list_items_table.find_previous_sibling("h2")
         self.assertIsNone(owner_heading)
 
+    @patch("lists.views.view_counts")
+    def test_counts_views_but_not_posts(self, mock_view_counts):
+        list_ = List.objects.create()
+        self.client.get(f"/lists/{list_.id}/")
+        self.client.post(f"/lists/{list_.id}/", data={"text": "new item"})
+        mock_view_counts.increment.assert_called_once_with(list_.id)
+
     def post_invalid_input(self):
         list_ = List.objects.create()
         response = self.client.post(
@@ -171,6 +180,238 @@ class ListViewTest(DjangoTestCase):
         return response
 
 
+class ListViewJSONTest(DjangoTestCase):
+    def post_item(self, list_, text, **headers):
+        return self.client.post(f"/lists/{list_.id}/", data={"text": text}, **headers)
+
+    def test_ajax_post_returns_only_the_new_item(self):
+        list_ = List.objects.create()
+        response = self.post_item(list_, "new item", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        item = Item.objects.get()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"item": {"id": item.pk, "text": "new item"}})
+
+    def test_json_accept_header_returns_the_new_item(self):
+        list_ = List.objects.create()
+        response = self.post_item(list_, "new item", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["item"]["text"], "new item")
+
+    @override_settings(LISTS_BATCH_ITEM_WRITES=True)
+    @patch("lists.forms.batching.item_writes")
+    def test_write_queue_timeout_is_a_retryable_503(self, mock_item_writes):
+        mock_item_writes.save.side_effect = futures.TimeoutError
+        response = self.post_item(List.objects.create(), "new item", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+
+    def test_ajax_post_doesnt_render_list_template(self):
+        list_ = List.objects.create()
+        response = self.post_item(list_, "new item", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertTemplateNotUsed(response, "list.html")
+
+    def test_ajax_post_with_empty_item_returns_error(self):
+        list_ = List.objects.create()
+        response = self.post_item(list_, "", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"errors": {"text": [EMPTY_ITEM_ERROR]}})
+        self.assertEqual(Item.objects.count(), 0)
+
+    def test_ajax_post_with_duplicate_item_returns_error(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="textey")
+        response = self.post_item(list_, "textey", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"errors": {"text": [DUPLICATE_ITEM_ERROR]}})
+
+
+@patch("lists.events.EVENT_STREAM_SECONDS", 0)
+class ListEventsViewTest(DjangoTestCase):
+    def test_returns_event_stream(self):
+        list_ = List.objects.create()
+        response = self.client.get(f"/lists/{list_.id}/events")
+        response.close()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+    def test_answers_204_when_the_worker_has_no_stream_to_spare(self):
+        list_ = List.objects.create()
+        with patch("lists.events.admission.counters.open_stream", return_value=False) as mock_open_stream:
+            response = self.client.get(f"/lists/{list_.id}/events")
+        self.assertEqual(response.status_code, 204)
+        mock_open_stream.assert_called_once_with(4)
+
+    def test_closing_the_stream_gives_its_slot_back(self):
+        list_ = List.objects.create()
+        with patch("lists.events.admission.counters") as mock_counters:
+            response = self.client.get(f"/lists/{list_.id}/events")
+            response.close()
+        mock_counters.close_stream.assert_called_once_with()
+
+    def test_list_table_links_to_changes_for_polling(self):
+        list_ = List.objects.create()
+        dom = self.get_DOM_for_response(self.client.get(f"/lists/{list_.id}/"))
+        table = dom.find("table", {"id": "id_list_table"})
+        self.assertEqual(table.get("data-changes-url"), f"/lists/{list_.id}/changes")
+
+    def test_streams_items_after_last_event_id(self):
+        list_ = List.objects.create()
+        seen = Item.objects.create(list=list_, text="seen item")
+        Item.objects.create(list=list_, text="unseen item")
+
+        response = self.client.get(f"/lists/{list_.id}/events", HTTP_LAST_EVENT_ID=str(seen.pk))
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertIn("unseen item", content)
+        self.assertNotIn('"seen item"', content)
+
+    def test_streams_items_after_query_parameter(self):
+        list_ = List.objects.create()
+        seen = Item.objects.create(list=list_, text="seen item")
+        Item.objects.create(list=list_, text="unseen item")
+
+        response = self.client.get(f"/lists/{list_.id}/events?after={seen.pk}")
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertIn("unseen item", content)
+        self.assertNotIn('"seen item"', content)
+
+    def test_without_cursor_only_streams_items_added_later(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="already on page")
+
+        response = self.client.get(f"/lists/{list_.id}/events")
+        content = b"".join(response.streaming_content).decode()
+
+        self.assertNotIn("already on page", content)
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        list_ = List.objects.create()
+        self.assertEqual(self.client.get(f"/lists/{list_.id}/events?after=abc").status_code, 400)
+        response = self.client.get(f"/lists/{list_.id}/events", HTTP_LAST_EVENT_ID="abc")
+        self.assertEqual(response.status_code, 400)
+
+    @patch("lists.forms.events.publish_new_item")
+    def test_adding_an_item_publishes_event(self, mock_publish):
+        list_ = List.objects.create()
+        self.client.post(f"/lists/{list_.id}/", data={"text": "new item"})
+        mock_publish.assert_called_once_with(Item.objects.get(text="new item"))
+
+    def test_list_table_links_to_events(self):
+        list_ = List.objects.create()
+        response = self.client.get(f"/lists/{list_.id}/")
+        dom = self.get_DOM_for_response(response)
+        table = dom.find("table", {"id": "id_list_table"})
+        self.assertEqual(table.get("data-events-url"), f"/lists/{list_.id}/events")
+
+
+class ListChangesViewTest(DjangoTestCase):
+    def test_returns_all_inserts_without_since(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="milk")
+
+        data = self.client.get(f"/lists/{list_.id}/changes").json()
+
+        self.assertEqual(data["list"], list_.id)
+        self.assertEqual(len(data["changes"]), 1)
+        change = data["changes"][0]
+        self.assertEqual((change["op"], change["id"], change["text"]), ("insert", item.pk, "milk"))
+        self.assertEqual(data["next"], change["seq"])
+        self.assertFalse(data["more"])
+
+    def test_returns_only_changes_after_since(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=list_, text="old")
+        since = self.client.get(f"/lists/{list_.id}/changes").json()["next"]
+        new_item = Item.objects.create(list=list_, text="new")
+
+        data = self.client.get(f"/lists/{list_.id}/changes?since={since}").json()
+
+        self.assertEqual([c["id"] for c in data["changes"]], [new_item.pk])
+
+    def test_includes_deletes_without_text(self):
+        list_ = List.objects.create()
+        item = Item.objects.create(list=list_, text="milk")
+        since = self.client.get(f"/lists/{list_.id}/changes").json()["next"]
+        item.delete()
+
+        data = self.client.get(f"/lists/{list_.id}/changes?since={since}").json()
+
+        self.assertEqual(data["changes"][0]["op"], "delete")
+        self.assertNotIn("text", data["changes"][0])
+
+    def test_doesnt_return_changes_of_other_lists(self):
+        list_ = List.objects.create()
+        Item.objects.create(list=List.objects.create(), text="other")
+        data = self.client.get(f"/lists/{list_.id}/changes").json()
+        self.assertEqual(data["changes"], [])
+        self.assertEqual(data["next"], 0)
+
+    @patch("lists.views.CHANGES_PAGE_SIZE", 2)
+    def test_pages_are_capped_and_can_be_continued(self):
+        list_ = List.objects.create()
+        for text in ["a", "b", "c"]:
+            Item.objects.create(list=list_, text=text)
+
+        first_page = self.client.get(f"/lists/{list_.id}/changes").json()
+        second_page = self.client.get(f"/lists/{list_.id}/changes?since={first_page['next']}").json()
+
+        self.assertEqual([c["text"] for c in first_page["changes"]], ["a", "b"])
+        self.assertTrue(first_page["more"])
+        self.assertEqual([c["text"] for c in second_page["changes"]], ["c"])
+        self.assertFalse(second_page["more"])
+
+    def test_invalid_since_is_a_bad_request(self):
+        list_ = List.objects.create()
+        response = self.client.get(f"/lists/{list_.id}/changes?since=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_includes_moves_with_the_new_neighbour(self):
+        list_ = List.objects.create()
+        first = Item.objects.create(list=list_, text="a")
+        second = Item.objects.create(list=list_, text="b")
+        since = self.client.get(f"/lists/{list_.id}/changes").json()["next"]
+        first.move_after(second)
+
+        data = self.client.get(f"/lists/{list_.id}/changes?since={since}").json()
+
+        change = data["changes"][0]
+        self.assertEqual((change["op"], change["id"], change["after"]), ("move", first.pk, second.pk))
+
+
+class MoveItemViewTest(DjangoTestCase):
+    def setUp(self):
+        self.list_ = List.objects.create()
+        self.items = [Item.objects.create(list=self.list_, text=text) for text in "abc"]
+
+    def move(self, item, after):
+        return self.client.post(f"/lists/{self.list_.id}/items/{item.pk}/move", data={"after": after})
+
+    def test_moves_item_after_the_given_item(self):
+        a, b, c = self.items
+        response = self.move(a, c.pk)
+        self.assertEqual(response.json(), {"item": {"id": a.pk, "after": c.pk}})
+        self.assertEqual([row.text for row in self.list_.item_rows()], list("bca"))
+
+    def test_empty_after_moves_item_to_the_top(self):
+        self.move(self.items[2], "")
+        self.assertEqual([row.text for row in self.list_.item_rows()], list("cab"))
+
+    def test_after_must_be_another_item_of_the_list(self):
+        other = Item.objects.create(list=List.objects.create(), text="other")
+        a = self.items[0]
+        for after in [other.pk, a.pk, "abc"]:
+            self.assertEqual(self.move(a, after).status_code, 400)
+
+    def test_item_of_another_list_is_not_found(self):
+        other = Item.objects.create(list=List.objects.create(), text="other")
+        self.assertEqual(self.move(other, "").status_code, 404)
+
+    def test_only_accepts_post(self):
+        response = self.client.get(f"/lists/{self.list_.id}/items/{self.items[0].pk}/move")
+        self.assertEqual(response.status_code, 405)
+
+
 class NewListViewIntegratedTest(DjangoTestCase):
     def test_can_save_a_POST_request(self):
         self.client.post('/lists/new', data={'text': 'A new list item'})
@@ -230,6 +471,24 @@ class NewListViewIntegratedTest(DjangoTestCase):
         self.assertEqual(list_.owner, user)
 
 
+class NewListWithItemsViewTest(DjangoTestCase):
+    def test_creates_list_with_an_item_per_line(self):
+        response = self.client.post("/lists/new/items", data={"text": "milk\neggs\nbread"})
+        list_ = List.objects.get()
+        self.assertRedirects(response, f"/lists/{list_.id}/")
+        self.assertEqual([row.text for row in list_.item_rows()], ["milk", "eggs", "bread"])
+
+    def test_GET_renders_multi_line_form(self):
+        response = self.client.get("/lists/new/items")
+        self.assertTemplateUsed(response, "new_list_items.html")
+        self.assertContains(response, "<textarea")
+
+    def test_invalid_input_saves_nothing_and_shows_error(self):
+        response = self.client.post("/lists/new/items", data={"text": "\n"})
+        self.assertEqual(List.objects.count(), 0)
+        self.assertContains(response, escape(EMPTY_ITEM_ERROR))
+
+
 class MyListsTest(DjangoTestCase):
     def test_my_lists_url_renders_my_lists_template(self):
         User.objects.create(email='a@b.com')
@@ -271,6 +530,27 @@ class MyListsTest(DjangoTestCase):
 
         self.assertListCollectionIsValid(response, heading_text, shared_lists)
 
+    @patch("lists.views.MY_LISTS_PAGE_SIZE", 1)
+    def test_links_to_older_lists_when_there_are_more(self):
+        owner = User.objects.create(email="owner@d.com")
+        older_list = List.create_new(first_item_text="older list", owner=owner)
+        List.create_new(first_item_text="newer list", owner=owner)
+
+        response = self.client.get(f'/lists/users/{owner.email}/')
+        dom = self.get_DOM_for_response(response)
+        older_link = dom.find("a", {"id": "id_older_lists"})
+        self.assertIsNotNone(older_link)
+        self.assertNotContains(response, "older list")
+
+        response = self.client.get(f'/lists/users/{owner.email}/' + older_link.get("href"))
+        self.assertContains(response, "older list")
+        self.assertNotContains(response, "newer list")
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        User.objects.create(email='a@b.com')
+        response = self.client.get('/lists/users/a@b.com/?before=nonsense')
+        self.assertEqual(response.status_code, 400)
+
     def assertListCollectionIsValid(self, response, heading_text, lists):
         dom = self.get_DOM_for_response(response)
         lists_h2 = dom.find("h2", text=heading_text)
@@ -287,6 +567,48 @@ class MyListsTest(DjangoTestCase):
             )
 
 
+class Jinja2TemplatesTest(DjangoTestCase):
+    def test_list_page_renders_the_same_with_both_engines(self):
+        owner = User.objects.create(email="owner@d.com")
+        list_ = List.create_new(first_item_text="1rst item", owner=owner)
+        Item.objects.create(list=list_, text="<b>escaped</b>")
+        sharee = User.objects.create(email="sharee@d.com")
+        list_.shared_with.add(sharee)
+        self.client.force_login(sharee)
+
+        self.assertSameOutlineWithBothEngines(f"/lists/{list_.id}/")
+
+    def test_list_page_errors_render_the_same_with_both_engines(self):
+        list_ = List.objects.create()
+        with self.settings(LISTS_TEMPLATE_ENGINE="jinja2"):
+            response = self.client.post(f"/lists/{list_.id}/", data={"text": ""})
+        self.assertContains(response, escape(EMPTY_ITEM_ERROR))
+
+    @patch("lists.views.MY_LISTS_PAGE_SIZE", 1)
+    def test_my_lists_renders_the_same_with_both_engines(self):
+        owner = User.objects.create(email="owner@d.com")
+        List.create_new(first_item_text="older list", owner=owner)
+        List.create_new(first_item_text="newer list", owner=owner)
+
+        self.assertSameOutlineWithBothEngines(f"/lists/users/{owner.email}/")
+
+    def assertSameOutlineWithBothEngines(self, url):
+        with self.settings(LISTS_TEMPLATE_ENGINE="django"):
+            django_outline = self.page_outline(self.client.get(url))
+        with self.settings(LISTS_TEMPLATE_ENGINE="jinja2"):
+            jinja2_outline = self.page_outline(self.client.get(url))
+        self.assertEqual(jinja2_outline, django_outline)
+
+    def page_outline(self, response):
+        dom = self.get_DOM_for_response(response)
+        for hidden_input in dom.find_all("input", {"type": "hidden"}):
+            del hidden_input["value"]
+        return [
+            (tag.name, sorted(tag.attrs.items()), tag.string.strip() if tag.string else None)
+            for tag in dom.find_all(True)
+        ]
+
+
 @patch('lists.views.NewListForm')
 class NewListViewUnitTest(unittest.TestCase):
     def setUp(self):
@@ -349,4 +671,15 @@ class ShareListTest(DjangoTestCase):
 
         self.assertIn(sharee, list_.shared_with.all())
 
+    @override_settings(TASKS_ALWAYS_EAGER=False)
+    def test_sharee_is_listed_on_the_page_it_redirects_to(self):
+        sharee = User.objects.create(email='share-recipient@example.com')
+        owner = User.objects.create(email='a@b.com')
+        list_ = List.objects.create(owner=owner)
+        self.client.force_login(owner)
+
+        response = self.client.post(f'/lists/{list_.id}/share', data={'sharee': sharee.email}, follow=True)
+
+        self.assertContains(response, sharee.email)
+
 
@@ -19,7 +19,12 @@ from lists import views
 
 urlpatterns = [
     url(r'^new$', views.new_list, name='new_list'),
+    url(r'^new/items$'     , views.new_list_with_items, name='new_list_with_items'),
     url(r'^(\d+)/share$'   , views.share_list, name='share_list'),
+    url(r'^(\d+)/publish$' , views.publish_list, name='publish_list'),
+    url(r'^(\d+)/events$'  , views.list_events, name='list_events'),
+    url(r'^(\d+)/changes$' , views.list_changes, name='list_changes'),
+    url(r'^(\d+)/items/(\d+)/move$', views.move_item, name='move_item'),
     url(r'^(\d+)/$'        , views.view_list, name='view_list'),
     url(r'^users/(.+)/$'   , views.my_lists , name='my_lists'),
 ]
@@ -1,28 +1,130 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.shortcuts import render, redirect
+from django.http import (
+    HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, render, redirect
+from django.views.decorators.http import require_POST
 
-from lists.forms import ExistingListItemForm, ItemForm, NewListForm
-from lists.models import List
+from lists import archive, events, snapshots
+from lists.counters import view_counts
+from lists.idempotency import idempotent
+from lists.forms import ExistingListItemForm, ItemForm, NewListForm, NewMultiItemListForm
+from lists.models import Item, ItemChange, List, ListMembership
 
 
 User = get_user_model()
 
+CHANGES_PAGE_SIZE = 500
+WRITE_RETRY_AFTER_SECONDS = 2
+MY_LISTS_PAGE_SIZE = 50
+
 
 def home_page(request):
     return render(request, 'home.html', {"form": ItemForm()})
 
 
+def wants_json(request):
+    return request.is_ajax() or "application/json" in request.META.get("HTTP_ACCEPT", "")
+
+
+@idempotent
 def view_list(request, list_id):
     list_ = List.objects.get(id=list_id)
+    if list_.archived:
+        archive.rehydrate(list_)
     form = ExistingListItemForm(for_list=list_)
     if request.method == 'POST':
         form = ExistingListItemForm(data=request.POST, for_list=list_)
-        if form.is_valid():
-            form.save()
+        item = form.save() if form.is_valid() else None
+        if item is not None:
+            if wants_json(request):
+                return JsonResponse({"item": {"id": item.pk, "text": item.text}}, status=201)
+            if list_.published:
+                # nginx answers the bare URL from the snapshot, which is
+                # only re-rendered after this response.
+                return redirect(list_.get_absolute_url() + "?edit")
             return redirect(list_)
-    return render(request, 'list.html', {'list': list_, "form": form})
+        if form.write_timed_out:
+            response = HttpResponse("Saving the item is taking too long, please try again.", status=503,
+                                    content_type="text/plain")
+            response["Retry-After"] = str(WRITE_RETRY_AFTER_SECONDS)
+            return response
+        if wants_json(request):
+            errors = {field: list(messages) for field, messages in form.errors.items()}
+            return JsonResponse({"errors": errors}, status=400)
+    else:
+        view_counts.increment(list_.id)
+    context = {'list': list_, "rows": list_.item_rows(), "form": form}
+    return render(request, 'list.html', context, using=settings.LISTS_TEMPLATE_ENGINE)
+
+
+def list_events(request, list_id):
+    list_ = List.objects.get(id=list_id)
+    if list_.archived:
+        archive.rehydrate(list_)
+    last_seen = request.META.get("HTTP_LAST_EVENT_ID") or request.GET.get("after")
+    if last_seen is None:
+        last_item = list_.item_set.order_by("pk").last()
+        last_seen = last_item.pk if last_item else 0
+    try:
+        last_seen = int(last_seen)
+    except ValueError:
+        return HttpResponseBadRequest("The last event id must be an integer")
+    stream = events.open_stream(list_.id, after_id=last_seen)
+    if stream is None:
+        # EventSource doesn't reconnect after a 204; the page polls
+        # list_changes instead.
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def list_changes(request, list_id):
+    list_ = List.objects.get(id=list_id)
+    try:
+        since = int(request.GET.get("since", 0))
+    except ValueError:
+        return JsonResponse({"error": "'since' must be an integer"}, status=400)
+    page = list(list_.changes.filter(pk__gt=since)[:CHANGES_PAGE_SIZE + 1])
+    has_more = len(page) > CHANGES_PAGE_SIZE
+    page = page[:CHANGES_PAGE_SIZE]
+    changes = []
+    for change in page:
+        entry = {"seq": change.seq, "op": change.kind, "id": change.item_id}
+        if change.kind == ItemChange.INSERT:
+            entry["text"] = change.text
+        elif change.kind == ItemChange.MOVE:
+            entry["after"] = change.after_id
+        changes.append(entry)
+    return JsonResponse({
+        "list": list_.id,
+        "changes": changes,
+        "next": page[-1].seq if page else since,
+        "more": has_more,
+    })
 
 
+@require_POST
+def move_item(request, list_id, item_id):
+    list_ = get_object_or_404(List, id=list_id)
+    if list_.archived:
+        archive.rehydrate(list_)
+    item = get_object_or_404(Item, list_id=list_id, pk=item_id)
+    after_id = request.POST.get("after", "")
+    after = None
+    if after_id:
+        if after_id.isdigit():
+            after = Item.objects.filter(list_id=list_id, pk=after_id).exclude(pk=item.pk).first()
+        if after is None:
+            return JsonResponse({"error": "'after' must be another item of this list"}, status=400)
+    item.move_after(after)
+    return JsonResponse({"item": {"id": item.pk, "after": after.pk if after is not None else None}})
+
+
+@idempotent
 def new_list(request):
     form = NewListForm(data=request.POST)
     if form.is_valid():
@@ -31,17 +133,50 @@ def new_list(request):
     return render(request, "home.html", {"form": form})
 
 
+@idempotent
+def new_list_with_items(request):
+    if request.method != "POST":
+        return render(request, "new_list_items.html", {"form": NewMultiItemListForm()})
+    form = NewMultiItemListForm(data=request.POST)
+    if form.is_valid():
+        list_ = form.save(owner=request.user)
+        return redirect(list_)
+    return render(request, "new_list_items.html", {"form": form})
+
+
 def my_lists(request, email):
     user = User.objects.get(email=email)
-    
-    return render(request, 'my_lists.html', {"user": user})
+    try:
+        memberships, next_cursor = ListMembership.page_for_user(
+            user, before=request.GET.get("before"), size=MY_LISTS_PAGE_SIZE
+        )
+    except ValueError:
+        return HttpResponseBadRequest("Invalid 'before' cursor")
+    return render(request, 'my_lists.html', {
+        "user": user,
+        "owned": [m for m in memberships if m.role == ListMembership.OWNER],
+        "shared": [m for m in memberships if m.role == ListMembership.SHAREE],
+        "next_cursor": next_cursor,
+    }, using=settings.LISTS_TEMPLATE_ENGINE)
 
 
 def share_list(request, list_id):
     if request.method == 'POST':
-        sharee_email = request.POST["sharee"]
-        sharee = User.objects.get(email=sharee_email)
+        # Written in the request: the page it redirects to lists the sharee.
+        sharee = User.objects.get(email=request.POST["sharee"])
         list_ = List.objects.get(id=list_id)
         list_.shared_with.add(sharee)
-        list_.save()
         return redirect(list_)
+
+
+@require_POST
+def publish_list(request, list_id):
+    list_ = get_object_or_404(List, id=list_id)
+    if not request.user.is_authenticated or list_.owner_id != request.user.pk:
+        return HttpResponseForbidden("Only the owner can publish a list")
+    if list_.archived:
+        archive.rehydrate(list_)
+    List.objects.filter(pk=list_.pk).update(published=request.POST.get("published", "on") == "on")
+    # Renders the snapshot, or removes it once the list is no longer published.
+    snapshots.renderer.list_changed(list_.pk)
+    return redirect(list_)
@@ -0,0 +1,37 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+from django.http import Http404
+
+OPS_TOKEN_SALT = 'ops.access'
+OPS_TOKEN_VALUE = 'ops'
+OPS_TOKEN_HEADER = 'HTTP_X_OPS_TOKEN'
+OPS_TOKEN_PARAM = '_ops_token'
+
+
+def make_ops_token():
+    return signing.TimestampSigner(salt=OPS_TOKEN_SALT).sign(OPS_TOKEN_VALUE)
+
+
+def is_valid_ops_token(token):
+    try:
+        value = signing.TimestampSigner(salt=OPS_TOKEN_SALT).unsign(token, max_age=settings.OPS_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return value == OPS_TOKEN_VALUE
+
+
+def has_ops_access(request):
+    token = request.META.get(OPS_TOKEN_HEADER) or request.GET.get(OPS_TOKEN_PARAM)
+    return bool(token) and is_valid_ops_token(token)
+
+
+# Ops endpoints answer 404 without a valid token, so they aren't advertised.
+def ops_only(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not has_ops_access(request):
+            raise Http404
+        return view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+
+READ = 'read'
+WRITE = 'write'
+PRIORITIES = (READ, WRITE)
+WRITE_METHODS = {'POST', 'PUT', 'PATCH', 'DELETE'}
+COUNTERS = ('in_flight', 'admitted', 'shed_in_flight', 'shed_queue_wait', 'served_stale', 'streams')
+QUEUE_START_HEADER = 'HTTP_X_REQUEST_START'
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# One row of counters per worker, all in one shared-memory array created at
+# import, i.e. before gunicorn forks the preloaded app. Host totals are the
+# sum of the rows. A worker claims the row of a dead one and resets its
+# in-flight counts, so a killed worker can't leave the host counts stuck.
+# Open event streams hold a request thread after their view has returned,
+# so they count as in flight too.
+class RequestCounters:
+    row_size = len(PRIORITIES) * len(COUNTERS)
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.values = multiprocessing.Array('q', slots * self.row_size)
+        self.pids = multiprocessing.Array('i', slots, lock=False)
+        self.lock = self.values.get_lock()
+        self._slot = None
+        self._slot_pid = None
+
+    def index(self, slot, priority, name):
+        return slot * self.row_size + PRIORITIES.index(priority) * len(COUNTERS) + COUNTERS.index(name)
+
+    def slot(self):
+        pid = os.getpid()
+        if self._slot_pid != pid:
+            with self.lock:
+                self._slot = self._claim(pid)
+                self._slot_pid = pid
+        return self._slot
+
+    def _claim(self, pid):
+        for slot in range(self.slots):
+            owner = self.pids[slot]
+            if owner in (0, pid) or not is_running(owner):
+                self.pids[slot] = pid
+                for priority in PRIORITIES:
+                    self.values[self.index(slot, priority, 'in_flight')] = 0
+                    self.values[self.index(slot, priority, 'streams')] = 0
+                return slot
+        # More workers than slots: the last row is shared.
+        return self.slots - 1
+
+    def in_flight(self, slots):
+        return sum(self.values[self.index(slot, priority, name)]
+                   for slot in slots for priority in PRIORITIES for name in ('in_flight', 'streams'))
+
+    def admit(self, priority, worker_limit, host_limit):
+        slot = self.slot()
+        with self.lock:
+            if self.in_flight([slot]) >= worker_limit or self.in_flight(range(self.slots)) >= host_limit:
+                return False
+            self.values[self.index(slot, priority, 'in_flight')] += 1
+            self.values[self.index(slot, priority, 'admitted')] += 1
+        return True
+
+    def open_stream(self, worker_limit):
+        slot = self.slot()
+        with self.lock:
+            if self.values[self.index(slot, READ, 'streams')] >= worker_limit:
+                return False
+            self.values[self.index(slot, READ, 'streams')] += 1
+        return True
+
+    def close_stream(self):
+        self.add(READ, 'streams', -1)
+
+    def add(self, priority, name, amount=1):
+        slot = self.slot()
+        with self.lock:
+            self.values[self.index(slot, priority, name)] += amount
+
+    def totals(self, slots):
+        return {
+            priority: {name: sum(self.values[self.index(slot, priority, name)] for slot in slots) for name in COUNTERS}
+            for priority in PRIORITIES
+        }
+
+    def snapshot(self):
+        slot = self.slot()
+        with self.lock:
+            return {'worker': self.totals([slot]), 'host': self.totals(range(self.slots))}
+
+
+def queue_wait_ms(request):
+    # nginx sets "X-Request-Start: t=<seconds since epoch>" ($msec).
+    value = request.META.get(QUEUE_START_HEADER, '')
+    try:
+        started = float(value[2:] if value.startswith('t=') else value)
+    except ValueError:
+        return None
+    return max(time.time() - started, 0) * 1000
+
+
+# The last good anonymous copy of each page, served instead of a 503 when
+# reads are shed. Anonymous pages carry no per-user data; the CSRF token in a
+# stale copy won't validate, so forms on it fail until the load passes.
+class StalePages:
+    def __init__(self, max_pages, max_age):
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self._pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def remember(self, request, response):
+        if (request.method != 'GET' or response.status_code != 200 or response.streaming
+                or settings.SESSION_COOKIE_NAME in request.COOKIES):
+            return
+        page = (time.monotonic(), response['Content-Type'], response.content)
+        with self._lock:
+            self._pages[request.get_full_path()] = page
+            self._pages.move_to_end(request.get_full_path())
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def get(self, request):
+        if request.method != 'GET' or settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        page = self._pages.get(request.get_full_path())
+        if page is None or time.monotonic() - page[0] > self.max_age:
+            return None
+        response = HttpResponse(page[2], content_type=page[1])
+        response['Warning'] = '110 - "Response is Stale"'
+        return response
+
+
+# Admission control: sheds requests once too many are already in flight in
+# this worker or on this host, or once a request has waited too long in the
+# proxy/gunicorn queue. Writes get higher limits than reads, so reads are
+# shed first, and a shed read gets a stale copy of the page when there is one.
+class AdmissionControlMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.counters = counters
+        self.stale_pages = StalePages(settings.ADMISSION_STALE_PAGES, settings.ADMISSION_STALE_SECONDS)
+        self.exempt = [re.compile(pattern) for pattern in settings.ADMISSION_EXEMPT_PATHS]
+
+    def __call__(self, request):
+        if any(pattern.match(request.path) for pattern in self.exempt):
+            return self.get_response(request)
+        priority = WRITE if request.method in WRITE_METHODS else READ
+        refusal = self.admit(request, priority)
+        if refusal is not None:
+            return self.shed(request, priority, refusal)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.counters.add(priority, 'in_flight', -1)
+        if priority == READ:
+            self.stale_pages.remember(request, response)
+        return response
+
+    def admit(self, request, priority):
+        wait = queue_wait_ms(request)
+        if wait is not None and wait > settings.ADMISSION_MAX_QUEUE_WAIT_MS[priority]:
+            return 'shed_queue_wait'
+        limits = settings.ADMISSION_LIMITS[priority]
+        if not self.counters.admit(priority, limits['worker'], limits['host']):
+            return 'shed_in_flight'
+        return None
+
+    def shed(self, request, priority, refusal):
+        self.counters.add(priority, refusal)
+        stale = self.stale_pages.get(request) if priority == READ else None
+        if stale is not None:
+            self.counters.add(priority, 'served_stale')
+            return stale
+        response = HttpResponse('The server is busy, please try again shortly.', status=503,
+                                content_type='text/plain')
+        response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+        return response
+
+
+counters = RequestCounters(settings.ADMISSION_WORKER_SLOTS)
@@ -0,0 +1,16 @@
+import tracemalloc
+
+from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+class OpsConfig(AppConfig):
+    name = 'ops'
+
+    def ready(self):
+        from ops.sql import instrument_connection
+        connection_created.connect(instrument_connection, dispatch_uid='ops.sql.instrument_connection')
+        if settings.TRACEMALLOC_AT_STARTUP:
+            # Started in the gunicorn master, tracing carries over into the workers.
+            tracemalloc.start(settings.TRACEMALLOC_FRAMES)
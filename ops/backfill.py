@@ -0,0 +1,102 @@
+import time
+
+from django.db import OperationalError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from ops.models import BackfillCheckpoint
+
+LOCKED_RETRIES = 5
+
+
+# A data change applied to an existing table a pk range at a time, instead
+# of in one migration transaction that holds the write lock until it's done.
+# Subclasses set `model` and implement update(queryset) for the rows of one
+# range, returning how many rows they changed. The update must be safe to
+# repeat on rows it already changed, and new rows must get the value from
+# the application code, since the runner only walks the pks that existed
+# when it started.
+class Backfill:
+    model = None
+
+    @property
+    def name(self):
+        return f"{type(self).__module__}.{type(self).__qualname__}"
+
+    def queryset(self):
+        return self.model._default_manager.order_by()
+
+    def update(self, queryset):
+        raise NotImplementedError
+
+
+class Progress:
+    def __init__(self, checkpoint, first_pk, max_pk, started):
+        self.checkpoint = checkpoint
+        self.first_pk = first_pk
+        self.max_pk = max_pk
+        self.started = started
+
+    @property
+    def fraction(self):
+        span = self.max_pk - self.first_pk
+        return 1.0 if span <= 0 else (self.checkpoint.last_pk - self.first_pk) / span
+
+    @property
+    def eta_seconds(self):
+        elapsed = time.monotonic() - self.started
+        if self.fraction <= 0:
+            return None
+        return elapsed * (1 - self.fraction) / self.fraction
+
+    def __str__(self):
+        eta = self.eta_seconds
+        eta = "?" if eta is None else f"{int(eta) // 60}m{int(eta) % 60:02d}s"
+        overall = (self.checkpoint.last_pk / self.max_pk) if self.max_pk else 1.0
+        return (f"{self.checkpoint.name}: pk {self.checkpoint.last_pk}/{self.max_pk} ({overall:.1%}), "
+                f"{self.checkpoint.rows} rows changed, ETA {eta}")
+
+
+def run_batch(backfill, checkpoint, start, end):
+    # The rows and the checkpoint commit together, so a batch is either
+    # fully done and recorded or not at all.
+    for attempt in range(LOCKED_RETRIES):
+        try:
+            with transaction.atomic():
+                changed = backfill.update(backfill.queryset().filter(pk__gte=start, pk__lte=end))
+                checkpoint.last_pk = end
+                checkpoint.rows += changed
+                checkpoint.save()
+            return
+        except OperationalError as e:
+            if "locked" not in str(e) or attempt == LOCKED_RETRIES - 1:
+                raise
+            checkpoint.refresh_from_db()
+            time.sleep(0.1 * 2 ** attempt)
+
+
+def run_backfill(backfill, batch_size, pause_seconds, max_batch_seconds=None, restart=False, report=None):
+    checkpoint, _ = BackfillCheckpoint.objects.get_or_create(name=backfill.name)
+    if restart:
+        checkpoint.last_pk, checkpoint.rows, checkpoint.finished_at = 0, 0, None
+        checkpoint.save()
+    max_pk = backfill.model._default_manager.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+    progress = Progress(checkpoint, checkpoint.last_pk, max_pk, time.monotonic())
+    size = batch_size
+    while checkpoint.last_pk < max_pk:
+        start = checkpoint.last_pk + 1
+        batch_started = time.monotonic()
+        run_batch(backfill, checkpoint, start, min(start + size - 1, max_pk))
+        # Halve the range while batches hold the lock for too long, and grow
+        # back towards batch_size once they're quick again.
+        if max_batch_seconds is not None:
+            if time.monotonic() - batch_started > max_batch_seconds:
+                size = max(size // 2, 1)
+            else:
+                size = min(size * 2, batch_size)
+        if report is not None:
+            report(progress)
+        time.sleep(pause_seconds)
+    checkpoint.finished_at = timezone.now()
+    checkpoint.save()
+    return progress
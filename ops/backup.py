@@ -0,0 +1,111 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import subprocess
+import time
+
+BACKUP_SUFFIX = '.sqlite3.gz'
+
+
+class BackupError(Exception):
+    pass
+
+
+class BackupReport:
+    def __init__(self, path, database_bytes, compressed_bytes, seconds, restarts):
+        self.path = path
+        self.database_bytes = database_bytes
+        self.compressed_bytes = compressed_bytes
+        self.seconds = seconds
+        self.restarts = restarts
+
+    @property
+    def megabytes_per_second(self):
+        return self.database_bytes / 1024 / 1024 / max(self.seconds, 1e-6)
+
+    def __str__(self):
+        return (
+            f'{os.path.basename(self.path)}: {self.database_bytes / 1024 / 1024:.1f} MiB in {self.seconds:.2f} s '
+            f'({self.megabytes_per_second:.1f} MiB/s), {self.compressed_bytes / 1024 / 1024:.1f} MiB compressed, '
+            + ('restarts n/a' if self.restarts is None else f'{self.restarts} restarts')
+        )
+
+
+def has_backup_api():
+    return hasattr(sqlite3.Connection, 'backup')
+
+
+def copy_online(source_path, destination_path, pages, pause_seconds):
+    # sqlite3's online backup copies `pages` pages per step and only holds
+    # a read lock during a step; sleeping in the progress callback between
+    # steps lets writers in. A write from another connection restarts the
+    # copy, which shows up as `remaining` not going down.
+    if not has_backup_api():
+        return copy_with_shell(source_path, destination_path)
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        if state['remaining'] is not None and remaining >= state['remaining']:
+            state['restarts'] += 1
+        state['remaining'] = remaining
+        time.sleep(pause_seconds)
+
+    source = sqlite3.connect(source_path)
+    destination = sqlite3.connect(destination_path)
+    try:
+        source.backup(destination, pages=pages, progress=progress)
+    finally:
+        destination.close()
+        source.close()
+    return state['restarts']
+
+
+def copy_with_shell(source_path, destination_path):
+    # Python before 3.7 has no backup API; the sqlite3 shell's .backup uses
+    # the same API, 100 pages a step, waiting out busy locks. It doesn't
+    # report restarts, so there is no count to return.
+    subprocess.run(['sqlite3', '-cmd', '.timeout 5000', source_path, f".backup '{destination_path}'"], check=True)
+    return None
+
+
+def integrity_problems(path):
+    with sqlite3.connect(path) as db:
+        problems = [row[0] for row in db.execute('PRAGMA integrity_check')]
+    return [] if problems == ['ok'] else problems
+
+
+def compress(path, destination_path):
+    with open(path, 'rb') as source, gzip.open(destination_path, 'wb', compresslevel=6) as destination:
+        shutil.copyfileobj(source, destination, 1024 * 1024)
+
+
+def rotate_backups(directory, prefix, keep):
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(prefix + '-') and name.endswith(BACKUP_SUFFIX)]
+    paths.sort()
+    for path in paths[:max(len(paths) - keep, 0)]:
+        os.remove(path)
+
+
+def backup_database(source_path, directory, name, pages, pause_seconds, keep):
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(directory, f'{name}-{stamp}{BACKUP_SUFFIX}')
+    partial = os.path.join(directory, f'.{name}-{stamp}.sqlite3.partial')
+    start = time.perf_counter()
+    try:
+        restarts = copy_online(source_path, partial, pages, pause_seconds)
+        problems = integrity_problems(partial)
+        if problems:
+            raise BackupError(f'Integrity check of the {name} snapshot failed: {"; ".join(problems[:5])}')
+        database_bytes = os.path.getsize(partial)
+        compress(partial, path + '.partial')
+        os.rename(path + '.partial', path)
+    finally:
+        for leftover in (partial, path + '.partial'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    seconds = time.perf_counter() - start
+    rotate_backups(directory, name, keep)
+    return BackupReport(path, database_bytes, os.path.getsize(path), seconds, restarts)
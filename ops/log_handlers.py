@@ -0,0 +1,119 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+_STOP = object()
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+# Request threads only format the record and drop it on a bounded queue; a
+# background thread writes queued lines to the stream in batches. When the
+# queue runs low on space, records below WARNING are dropped first so that
+# errors still get through, and nothing ever waits on log I/O.
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, capacity=10000, reserved_for_warnings=0.2, batch_size=200, stream=None):
+        super().__init__(None)
+        self.capacity = capacity
+        self.low_severity_limit = capacity - int(capacity * reserved_for_warnings)
+        self.batch_size = batch_size
+        self.stream = stream or sys.stderr
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._pid = None
+        self._writer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush_and_stop)
+
+    def _ensure_writer(self):
+        # Threads and queue locks don't survive a fork, so a preloaded
+        # gunicorn worker starts its own queue and writer.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self.capacity)
+                self._writer = threading.Thread(target=self._write_batches, name='log-writer', daemon=True)
+                self._writer.start()
+                self._pid = os.getpid()
+
+    def prepare(self, record):
+        # The base class reads back record.message, which only
+        # logging.Formatter sets; the formatted line is all we queue anyway.
+        # Other handlers of the same logger still get the record unchanged.
+        record = copy.copy(record)
+        record.msg = self.format(record)
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_writer()
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self.low_severity_limit:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_batches(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for record in batch:
+                if record is _STOP:
+                    stopping = True
+                else:
+                    lines.append(record.msg)
+            if self.dropped != self._reported_dropped:
+                lines.append(self.format(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f'Dropped {self.dropped - self._reported_dropped} log records, queue was full',
+                })))
+                self._reported_dropped = self.dropped
+            if lines:
+                self.stream.write('\n'.join(lines) + '\n')
+                self.stream.flush()
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush_and_stop(self, timeout=2):
+        if self._pid != os.getpid() or self._writer is None or not self._writer.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+        self._pid = None
+
+    def close(self):
+        self.flush_and_stop()
+        super().close()
@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ops.backup import BackupError, backup_database, has_backup_api
+
+
+class Command(BaseCommand):
+    help = ('Takes a consistent, gzipped snapshot of each SQLite database with the online backup API, '
+            'copying a few pages at a time so live writes carry on, and checks its integrity.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', action='append', dest='databases',
+                            help='Database alias to back up; repeat for several. Defaults to all of them.')
+        parser.add_argument('--dir', default=settings.BACKUP_DIR)
+        parser.add_argument('--pages', type=int, default=settings.BACKUP_PAGES_PER_STEP)
+        parser.add_argument('--pause', type=float, default=settings.BACKUP_PAUSE_SECONDS)
+        parser.add_argument('--keep', type=int, default=settings.BACKUP_KEEP)
+
+    def handle(self, *args, **options):
+        if not has_backup_api() and (options['pages'] != settings.BACKUP_PAGES_PER_STEP
+                                     or options['pause'] != settings.BACKUP_PAUSE_SECONDS):
+            self.stderr.write('This Python has no sqlite3 backup API; the sqlite3 shell copies '
+                              '100 pages a step without pausing, so --pages and --pause are ignored.')
+        for alias in options['databases'] or list(settings.DATABASES):
+            database = settings.DATABASES.get(alias)
+            if database is None:
+                raise CommandError(f'Unknown database {alias!r}')
+            if not database['ENGINE'].endswith('sqlite3'):
+                raise CommandError(f'{alias} is not an SQLite database')
+            if not os.path.exists(database['NAME']):
+                self.stdout.write(f'{alias}: {database["NAME"]} does not exist yet, skipping')
+                continue
+            try:
+                report = backup_database(database['NAME'], options['dir'], alias, options['pages'],
+                                         options['pause'], options['keep'])
+            except BackupError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'{alias}: {report}')
@@ -0,0 +1,60 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ops.query_plans import Sample, canonical_queries, full_scans, seed, time_query
+from ops.sql import explain_query_plan
+from superlists.benchmarking import benchmark_database
+
+
+class Command(BaseCommand):
+    help = ('Seeds a large throwaway database, checks that the hot ORM queries use indexes '
+            'and compares their timings with a recorded baseline.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lists', type=int, default=5000)
+        parser.add_argument('--items-per-list', type=int, default=40)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'query_plan_baseline.json'))
+        parser.add_argument('--record', action='store_true', help='overwrite the baseline with this run')
+        parser.add_argument('--tolerance', type=float, default=2.0,
+                            help='fail when a query is this many times slower than its baseline')
+
+    def handle(self, *args, **options):
+        baseline = {}
+        if os.path.exists(options['baseline']) and not options['record']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        with benchmark_database():
+            seed(options['lists'], options['items_per_list'], options['users'])
+            problems, timings = self.check_queries(baseline, options['repeat'], options['tolerance'])
+
+        if options['record']:
+            with open(options['baseline'], 'w') as f:
+                json.dump(timings, f, indent=2, sort_keys=True)
+            self.stdout.write(f'Recorded baseline in {options["baseline"]}')
+        if problems:
+            raise CommandError('\n'.join(problems))
+
+    def check_queries(self, baseline, repeat, tolerance):
+        problems = []
+        timings = {}
+        for name, queryset in canonical_queries(Sample()).items():
+            sql, params = queryset.query.sql_with_params()
+            plan = explain_query_plan(connection, sql, params)
+            timings[name] = time_query(queryset, repeat)
+            previous = baseline.get(name)
+            compared = f' (baseline {previous:.3f} ms)' if previous else ''
+            self.stdout.write(f'{timings[name]:8.3f} ms  {name}{compared}')
+            for line in plan:
+                self.stdout.write(f'              {line}')
+            for scan in full_scans(plan):
+                problems.append(f'{name}: full scan "{scan}"')
+            if previous and timings[name] > previous * tolerance:
+                problems.append(f'{name}: {timings[name]:.3f} ms is over {tolerance}x the baseline')
+        return problems, timings
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ops.sessions import delete_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired sessions in small chunks so the sessions database is never locked for long.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPIRED_SESSIONS_CHUNK_SIZE)
+        parser.add_argument('--pause', type=float, default=settings.EXPIRED_SESSIONS_PAUSE_SECONDS)
+
+    def handle(self, *args, **options):
+        deleted = delete_expired_sessions(options['chunk_size'], options['pause'])
+        self.stdout.write(f'Deleted {deleted} expired sessions')
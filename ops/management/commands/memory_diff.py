@@ -0,0 +1,32 @@
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ops.memory import diff
+
+
+class Command(BaseCommand):
+    help = 'Shows allocation growth between two tracemalloc snapshots dumped by /ops/memory, grouped by module.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('old')
+        parser.add_argument('new')
+        parser.add_argument('--top', type=int, default=settings.MEMORY_DIFF_TOP)
+
+    def handle(self, *args, **options):
+        old = tracemalloc.Snapshot.load(options['old'])
+        new = tracemalloc.Snapshot.load(options['new'])
+        result = diff(new, old, options['top'])
+        self.write_groups('Growth by allocating module', result['modules'])
+        self.write_groups('Growth by project caller', result['callers'])
+
+    def write_groups(self, title, groups):
+        self.stdout.write(title)
+        self.stdout.write(f'{"size diff":>12} {"blocks diff":>12} {"size":>12}  name')
+        for group in groups:
+            area = f'  [{group["area"]}]' if group.get('area', group['name']) != group['name'] else ''
+            self.stdout.write(
+                f'{group["size_diff"]:>+12,} {group["count_diff"]:>+12,} {group["size"]:>12,}  {group["name"]}{area}'
+            )
+        self.stdout.write('')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ops.access import make_ops_token
+
+
+class Command(BaseCommand):
+    help = 'Prints a signed token for the X-Ops-Token header (or _ops_token query flag).'
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_ops_token())
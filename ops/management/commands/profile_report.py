@@ -0,0 +1,52 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ops.profiling import PROFILE_SUFFIX
+
+
+def read_profiles(directory):
+    stacks_by_url = defaultdict(Counter)
+    profiles_by_url = Counter()
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(PROFILE_SUFFIX):
+            continue
+        url_name = filename[:-len(PROFILE_SUFFIX)].rsplit('.', 3)[0]
+        profiles_by_url[url_name] += 1
+        with open(os.path.join(directory, filename)) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                stacks_by_url[url_name][stack] += int(count)
+    return stacks_by_url, profiles_by_url
+
+
+def inclusive_counts(stacks):
+    counts = Counter()
+    for stack, count in stacks.items():
+        for label in set(stack.split(';')):
+            counts[label] += count
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Merges sampled request profiles into one flamegraph-ready file per URL name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default=settings.PROFILING_DIR)
+        parser.add_argument('--output', default=os.path.join(settings.PROFILING_DIR, 'report'))
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        stacks_by_url, profiles_by_url = read_profiles(options['profiles'])
+        os.makedirs(options['output'], exist_ok=True)
+        for url_name, stacks in sorted(stacks_by_url.items()):
+            path = os.path.join(options['output'], url_name + PROFILE_SUFFIX)
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            total = sum(stacks.values())
+            self.stdout.write(f'{url_name}: {profiles_by_url[url_name]} requests, {total} samples -> {path}')
+            for label, count in inclusive_counts(stacks).most_common(options['top']):
+                self.stdout.write(f'  {100 * count / total:5.1f}%  {label}')
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from ops.backfill import Backfill, run_backfill
+from ops.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = ('Runs a backfill (an ops.backfill.Backfill subclass, given by dotted path) over its table in small '
+            'pk ranges, pausing between them; an interrupted run picks up from its last checkpoint.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('backfill', nargs='?', help='e.g. lists.backfills.MembershipDisplayNames')
+        parser.add_argument('--batch-size', type=int, default=settings.BACKFILL_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=settings.BACKFILL_PAUSE_SECONDS)
+        parser.add_argument('--max-batch-ms', type=float, default=settings.BACKFILL_MAX_BATCH_MS,
+                            help='Shrink the batches while one takes longer than this.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from pk 1.')
+        parser.add_argument('--report-every', type=float, default=5, help='Seconds between progress lines.')
+
+    def handle(self, *args, **options):
+        if not options['backfill']:
+            for checkpoint in BackfillCheckpoint.objects.order_by('name'):
+                self.stdout.write(str(checkpoint))
+            return
+        try:
+            backfill_class = import_string(options['backfill'])
+        except ImportError as e:
+            raise CommandError(str(e))
+        if not (isinstance(backfill_class, type) and issubclass(backfill_class, Backfill)):
+            raise CommandError(f'{options["backfill"]} is not a Backfill')
+
+        last_report = [0]
+
+        def report(progress):
+            if time.monotonic() - last_report[0] >= options['report_every']:
+                last_report[0] = time.monotonic()
+                self.stdout.write(str(progress))
+
+        progress = run_backfill(
+            backfill_class(), options['batch_size'], options['pause'], options['max_batch_ms'] / 1000,
+            restart=options['restart'], report=report,
+        )
+        self.stdout.write(f'Done: {progress}')
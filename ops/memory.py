@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+
+SNAPSHOT_SUFFIX = '.tracemalloc'
+IGNORED_FILES = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>',
+                 '<unknown>')
+AREAS = (('django.db', 'ORM'), ('django.template', 'templates'), ('jinja2', 'templates'))
+
+_previous_snapshot = None
+
+
+@lru_cache(maxsize=4096)
+def module_name(filename):
+    path = os.path.abspath(filename)
+    roots = [os.path.abspath(entry) for entry in sys.path if entry]
+    root = max((root for root in roots if path.startswith(root + os.sep)), key=len, default=None)
+    if root is None:
+        return filename
+    name, extension = os.path.splitext(os.path.relpath(path, root))
+    if extension != '.py':
+        # Compiled Jinja2 templates keep their template's path.
+        return os.path.relpath(path, root)
+    name = name.replace(os.sep, '.')
+    return name[:-len('.__init__')] if name.endswith('.__init__') else name
+
+
+def area(module):
+    for prefix, label in AREAS:
+        if module == prefix or module.startswith(prefix + '.'):
+            return label
+    return module
+
+
+def is_project_file(filename):
+    return os.path.abspath(filename).startswith(settings.BASE_DIR + os.sep) and '-packages' not in filename
+
+
+def start(frames):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return status()
+
+
+def stop():
+    global _previous_snapshot
+    tracemalloc.stop()
+    _previous_snapshot = None
+    return status()
+
+
+def status():
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        'pid': os.getpid(),
+        'tracing': tracing,
+        'frames': tracemalloc.get_traceback_limit() if tracing else 0,
+        'traced_bytes': current,
+        'peak_bytes': peak,
+    }
+
+
+def take_snapshot(directory):
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, filename) for filename in IGNORED_FILES]
+    )
+    os.makedirs(directory, exist_ok=True)
+    filename = f'{os.getpid()}.{time.time():.6f}{SNAPSHOT_SUFFIX}'
+    snapshot.dump(os.path.join(directory, filename))
+    return filename, snapshot
+
+
+def innermost_first(traceback):
+    # tracemalloc lists the most recent frame first before Python 3.7, and
+    # last from 3.7 on.
+    frames = list(traceback)
+    return frames if sys.version_info < (3, 7) else frames[::-1]
+
+
+# Allocation growth between two snapshots, summed per module of the frame
+# that allocated ("where") and per innermost frame in this project's own
+# code ("caller"), so ORM and template memory shows up against the view
+# that asked for it when the traceback is deep enough.
+def diff(new, old, top):
+    by_module = defaultdict(lambda: {'size_diff': 0, 'count_diff': 0, 'size': 0})
+    by_caller = defaultdict(lambda: {'size_diff': 0, 'count_diff': 0, 'size': 0})
+    for stat in new.compare_to(old, 'traceback'):
+        frames = innermost_first(stat.traceback)
+        where = module_name(frames[0].filename)
+        callers = [frame for frame in frames if is_project_file(frame.filename)]
+        caller = f'{module_name(callers[0].filename)}:{callers[0].lineno}' if callers else 'outside project code'
+        for groups, key in ((by_module, where), (by_caller, caller)):
+            groups[key]['size_diff'] += stat.size_diff
+            groups[key]['count_diff'] += stat.count_diff
+            groups[key]['size'] += stat.size
+    return {
+        'modules': top_groups(by_module, top, with_area=True),
+        'callers': top_groups(by_caller, top),
+    }
+
+
+def top_groups(groups, top, with_area=False):
+    rows = sorted(groups.items(), key=lambda item: abs(item[1]['size_diff']), reverse=True)[:top]
+    return [dict(totals, name=name, **({'area': area(name)} if with_area else {})) for name, totals in rows]
+
+
+def snapshot_and_diff(directory, top):
+    global _previous_snapshot
+    filename, snapshot = take_snapshot(directory)
+    result = diff(snapshot, _previous_snapshot, top) if _previous_snapshot is not None else None
+    _previous_snapshot = snapshot
+    return filename, result
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+# How far a backfill (ops.backfill) got, saved in the same transaction as
+# each batch so an interrupted run resumes after the last committed batch.
+class BackfillCheckpoint(models.Model):
+    name = models.CharField(max_length=200, primary_key=True)
+    last_pk = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        state = "finished" if self.finished_at else f"at pk {self.last_pk}"
+        return f"{self.name}: {state}, {self.rows} rows"
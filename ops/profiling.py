@@ -0,0 +1,93 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from ops.access import is_valid_ops_token
+
+PROFILE_SUFFIX = '.folded'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+
+
+def frame_label(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+# Samples one thread's stack from a helper thread, producing the
+# "frame;frame;frame count" lines that flamegraph tools read.
+class StackSampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse_stack(frame)] += 1
+
+
+def write_profile(directory, url_name, stacks, max_files):
+    os.makedirs(directory, exist_ok=True)
+    filename = f'{url_name}.{time.time():.6f}.{os.getpid()}{PROFILE_SUFFIX}'
+    with open(os.path.join(directory, filename), 'w') as f:
+        for stack, count in stacks.items():
+            f.write(f'{stack} {count}\n')
+    rotate_profiles(directory, max_files)
+    return filename
+
+
+def rotate_profiles(directory, max_files):
+    paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(PROFILE_SUFFIX)]
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:max(len(paths) - max_files, 0)]:
+        os.remove(path)
+
+
+def should_profile(request):
+    token = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+    if token:
+        return is_valid_ops_token(token)
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_SECONDS)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        match = request.resolver_match
+        url_name = match.url_name if match and match.url_name else 'unresolved'
+        write_profile(settings.PROFILING_DIR, url_name, sampler.stacks, settings.PROFILING_MAX_FILES)
+        return response
@@ -0,0 +1,103 @@
+import re
+import statistics
+import time
+from collections import OrderedDict
+
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import Token, User
+from lists.models import ITEM_ROWS_CHUNK_SIZE, POSITION_GAP, Item, ItemChange, List, ListMembership
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)')
+LARGE_TABLES = {
+    'accounts_token', 'accounts_user', 'lists_item', 'lists_itemchange', 'lists_list',
+    'lists_list_shared_with', 'lists_listmembership',
+}
+
+
+class Sample:
+    def __init__(self):
+        self.list_ = List.objects.order_by('-pk').first()
+        self.item = self.list_.item_set.last()
+        self.owner = self.list_.owner
+        self.sharee = self.list_.shared_with.first()
+        self.membership = ListMembership.objects.filter(user=self.owner).first()
+        self.token = Token.objects.first()
+
+
+# The queries behind every view in lists.views and accounts, keyed by the
+# code path that issues them.
+def canonical_queries(sample):
+    ListSharee = List.shared_with.through
+    return OrderedDict([
+        ('view_list: list by id', List.objects.filter(id=sample.list_.id)),
+        ('view_list: item rows chunk', Item.objects.filter(list_id=sample.list_.id, position__gte=sample.item.position)
+            .exclude(position=sample.item.position, pk__lte=sample.item.pk)
+            .values_list('pk', 'text', 'position')[:ITEM_ROWS_CHUNK_SIZE]),
+        ('move_item: following item', Item.objects.filter(list_id=sample.list_.id, position__gte=sample.item.position)
+            .exclude(pk=sample.item.pk).values_list('position', flat=True)[:1]),
+        ('item add: last position', Item.objects.filter(list_id=sample.list_.id).order_by('-position')
+            .values_list('position', flat=True)[:1]),
+        ('view_list: sharees of list', sample.list_.shared_with.all()),
+        ('view_list: duplicate item check', Item.objects.filter(list=sample.list_, text=sample.item.text)),
+        ('list_events: items after id', Item.objects.filter(list_id=sample.list_.id, pk__gt=sample.item.pk)
+            .order_by('pk')),
+        ('list_changes: changes after seq', sample.list_.changes.filter(pk__gt=0)[:501]),
+        ('item add: membership touch', ListMembership.objects.filter(list_id=sample.list_.id).order_by()),
+        ('my_lists: user by email', User.objects.filter(email=sample.owner.email)),
+        ('my_lists: first page', ListMembership.for_user(sample.owner)[:51]),
+        ('my_lists: page after cursor', ListMembership.for_user(sample.owner, before=sample.membership.cursor)[:51]),
+        ('lists by owner', List.objects.filter(owner=sample.owner)),
+        ('lists shared with user', sample.sharee.shared_with.all()),
+        ('sharees of list', ListSharee.objects.filter(list_id=sample.list_.id)),
+        ('lists of sharee', ListSharee.objects.filter(user_id=sample.sharee.pk)),
+        ('archive: next batch of lists', List.objects.filter(pk__gt=0, archived=False, published=False).order_by('pk')
+            .values_list('pk', flat=True)[:200]),
+        ('archive: recent changes of batch', ItemChange.objects.filter(list_id__in=[sample.list_.id],
+            changed_at__gte=timezone.now()).values_list('list_id', flat=True).distinct()),
+        ('accounts: token by uid', Token.objects.filter(uid=sample.token.uid)),
+        ('accounts: token by email', Token.objects.filter(email=sample.token.email)),
+    ])
+
+
+def full_scans(plan):
+    return [line for line in plan if FULL_SCAN.match(line) and FULL_SCAN.match(line).group(1) in LARGE_TABLES]
+
+
+def time_query(queryset, repeat):
+    sql, params = queryset.query.sql_with_params()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def seed(lists, items_per_list, users, shares_per_list=2):
+    User.objects.bulk_create(User(email=f'user{n}@example.com') for n in range(users))
+    Token.objects.bulk_create(Token(email=f'user{n}@example.com') for n in range(users))
+    List.objects.bulk_create(List(owner_id=f'user{n % users}@example.com') for n in range(lists))
+    list_ids = list(List.objects.values_list('pk', flat=True))
+    ListSharee = List.shared_with.through
+    ListSharee.objects.bulk_create(
+        ListSharee(list_id=list_id, user_id=f'user{(list_id + k + 1) % users}@example.com')
+        for list_id in list_ids for k in range(shares_per_list)
+    )
+    Item.objects.bulk_create(
+        Item(list_id=list_id, text=f'item {n}', position=(n + 1) * POSITION_GAP)
+        for list_id in list_ids for n in range(items_per_list)
+    )
+    ItemChange.objects.bulk_create(
+        ItemChange(list_id=list_id, item_id=item_id, kind=ItemChange.INSERT, text=text)
+        for item_id, list_id, text in Item.objects.values_list('pk', 'list_id', 'text').iterator()
+    )
+    ListMembership.objects.bulk_create(
+        ListMembership(user_id=owner_id, list_id=list_id, role=ListMembership.OWNER, display_name='item 0')
+        for list_id, owner_id in List.objects.values_list('pk', 'owner_id').iterator()
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
@@ -0,0 +1,21 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+
+# Deletes expired sessions a small chunk at a time, each chunk in its own
+# short write transaction, instead of clearsessions' single big DELETE that
+# holds the database lock until it finishes.
+def delete_expired_sessions(chunk_size, pause_seconds, now=None):
+    now = now or timezone.now()
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list('pk', flat=True)[:chunk_size])
+        if not keys:
+            return deleted
+        Session.objects.filter(pk__in=keys).delete()
+        deleted += len(keys)
+        if len(keys) < chunk_size:
+            return deleted
+        time.sleep(pause_seconds)
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+
+logger = logging.getLogger('ops.sql')
+
+_local = threading.local()
+
+
+def explain_query_plan(db, sql, params=None):
+    cursor = db.create_cursor()
+    try:
+        if db.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params or ())
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN ' + sql, params or ())
+        return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def is_explainable(sql):
+    return sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE')
+
+
+class RequestQueries:
+    def __init__(self, view_name):
+        self.view_name = view_name
+        self.statements = Counter()
+
+
+def current_view_name():
+    request_queries = getattr(_local, 'request_queries', None)
+    return request_queries.view_name if request_queries else None
+
+
+def record_query(db, sql, params, seconds):
+    request_queries = getattr(_local, 'request_queries', None)
+    if request_queries is not None:
+        request_queries.statements[sql] += 1
+    milliseconds = seconds * 1000
+    if milliseconds < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    plan = []
+    if is_explainable(sql):
+        try:
+            plan = explain_query_plan(db, sql, params)
+        except DatabaseError as e:
+            plan = [f'unavailable: {e}']
+    logger.warning(
+        'Slow query (%.1f ms) on %s from %s: %s\n  plan: %s',
+        milliseconds, db.alias, current_view_name() or 'unknown view', sql, '\n        '.join(plan),
+    )
+
+
+class TimedCursorWrapper(CursorWrapper):
+    def execute(self, sql, params=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            record_query(self.db, sql, params, time.perf_counter() - start)
+
+    def executemany(self, sql, param_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, param_list)
+        finally:
+            record_query(self.db, sql, None, time.perf_counter() - start)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    if connection.alias not in settings.SLOW_QUERY_LOG_DATABASES or getattr(connection, 'ops_instrumented', False):
+        return
+    connection.make_cursor = lambda cursor: TimedCursorWrapper(cursor, connection)
+    connection.make_debug_cursor = lambda cursor: TimedCursorWrapper(CursorDebugWrapper(cursor, connection), connection)
+    connection.ops_instrumented = True
+
+
+class QueryLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _local.request_queries = RequestQueries(view_name=None)
+        try:
+            return self.get_response(request)
+        finally:
+            request_queries, _local.request_queries = _local.request_queries, None
+            self.warn_about_repeated_queries(request, request_queries)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _local.request_queries.view_name = f'{view_func.__module__}.{view_func.__name__}'
+
+    def warn_about_repeated_queries(self, request, request_queries):
+        for sql, count in request_queries.statements.items():
+            if count >= settings.N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    'Possible N+1: %d executions in %s (%s): %s',
+                    count, request_queries.view_name or 'unknown view', request.path, sql,
+                )
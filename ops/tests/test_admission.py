@@ -0,0 +1,114 @@
+import time
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ops.access import make_ops_token
+from ops.admission import READ, WRITE, AdmissionControlMiddleware, RequestCounters
+
+
+@override_settings(
+    ADMISSION_LIMITS={'read': {'worker': 2, 'host': 3}, 'write': {'worker': 3, 'host': 4}},
+    ADMISSION_MAX_QUEUE_WAIT_MS={'read': 100, 'write': 1000},
+)
+class AdmissionControlMiddlewareTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = AdmissionControlMiddleware(lambda request: HttpResponse('fresh page'))
+        self.middleware.counters = RequestCounters(slots=2)
+
+    def occupy(self, priority, count):
+        self.middleware.counters.add(priority, 'in_flight', count)
+
+    def test_admits_requests_under_the_limits(self):
+        response = self.middleware(self.factory.get('/lists/1/'))
+        self.assertEqual(response.status_code, 200)
+        counts = self.middleware.counters.snapshot()['worker'][READ]
+        self.assertEqual(counts['admitted'], 1)
+        self.assertEqual(counts['in_flight'], 0)
+
+    def test_sheds_reads_over_the_worker_limit_with_retry_after(self):
+        self.occupy(READ, 2)
+        response = self.middleware(self.factory.get('/lists/1/'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(self.middleware.counters.snapshot()['host'][READ]['shed_in_flight'], 1)
+
+    def test_writes_are_shed_later_than_reads(self):
+        self.occupy(READ, 2)
+        response = self.middleware(self.factory.post('/lists/1/', data={'text': 'milk'}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_host_limit_counts_other_workers(self):
+        counters = self.middleware.counters
+        counters.values[counters.index(1, WRITE, 'in_flight')] = 4
+        response = self.middleware(self.factory.post('/lists/1/'))
+        self.assertEqual(response.status_code, 503)
+
+    def test_sheds_requests_that_waited_too_long_in_the_queue(self):
+        started = f't={time.time() - 0.5:.3f}'
+        read = self.middleware(self.factory.get('/lists/1/', HTTP_X_REQUEST_START=started))
+        write = self.middleware(self.factory.post('/lists/1/', HTTP_X_REQUEST_START=started))
+        self.assertEqual(read.status_code, 503)
+        self.assertEqual(write.status_code, 200)
+        self.assertEqual(self.middleware.counters.snapshot()['worker'][READ]['shed_queue_wait'], 1)
+
+    def test_shed_anonymous_read_gets_stale_copy(self):
+        self.middleware(self.factory.get('/lists/1/'))
+        self.occupy(READ, 2)
+        response = self.middleware(self.factory.get('/lists/1/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'fresh page')
+        self.assertIn('Stale', response['Warning'])
+
+    def test_no_stale_copy_for_logged_in_users(self):
+        self.middleware(self.factory.get('/lists/1/'))
+        self.occupy(READ, 2)
+        request = self.factory.get('/lists/1/')
+        request.COOKIES['sessionid'] = 'abc'
+        self.assertEqual(self.middleware(request).status_code, 503)
+
+    def test_exempt_paths_are_never_shed(self):
+        self.occupy(READ, 2)
+        self.assertEqual(self.middleware(self.factory.get('/ops/admission')).status_code, 200)
+
+    def test_open_event_streams_count_as_in_flight(self):
+        self.occupy(READ, 1)
+        self.assertTrue(self.middleware.counters.open_stream(worker_limit=4))
+        self.assertEqual(self.middleware(self.factory.get('/lists/1/')).status_code, 503)
+        self.middleware.counters.close_stream()
+        self.assertEqual(self.middleware(self.factory.get('/lists/1/')).status_code, 200)
+
+
+class RequestCountersTest(TestCase):
+    def test_rows_of_dead_workers_are_reclaimed_with_in_flight_reset(self):
+        counters = RequestCounters(slots=1)
+        counters.pids[0] = 999999999
+        counters.values[counters.index(0, READ, 'in_flight')] = 5
+        counters.values[counters.index(0, READ, 'admitted')] = 7
+
+        with patch('ops.admission.is_running', return_value=False):
+            snapshot = counters.snapshot()
+
+        self.assertEqual(snapshot['host'][READ]['in_flight'], 0)
+        self.assertEqual(snapshot['host'][READ]['admitted'], 7)
+
+    def test_streams_are_capped_per_worker(self):
+        counters = RequestCounters(slots=1)
+        self.assertTrue(counters.open_stream(worker_limit=2))
+        self.assertTrue(counters.open_stream(worker_limit=2))
+        self.assertFalse(counters.open_stream(worker_limit=2))
+        counters.close_stream()
+        self.assertTrue(counters.open_stream(worker_limit=2))
+        self.assertEqual(counters.snapshot()['worker'][READ]['streams'], 2)
+
+
+class AdmissionStatsViewTest(TestCase):
+    def test_requires_ops_token(self):
+        self.assertEqual(self.client.get('/ops/admission').status_code, 404)
+
+    def test_exports_counters(self):
+        response = self.client.get('/ops/admission', HTTP_X_OPS_TOKEN=make_ops_token())
+        self.assertEqual(set(response.json()), {'pid', 'worker', 'host'})
+        self.assertIn('shed_in_flight', response.json()['host'][READ])
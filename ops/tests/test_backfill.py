@@ -0,0 +1,116 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.test import TestCase
+
+from lists.backfills import MembershipDisplayNames
+from lists.models import Item, List, ListMembership
+from ops.backfill import Backfill, run_backfill
+from ops.models import BackfillCheckpoint
+
+User = get_user_model()
+
+
+class MarkItems(Backfill):
+    model = Item
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.batches = []
+
+    def queryset(self):
+        return super().queryset().exclude(text__endswith="!")
+
+    def update(self, queryset):
+        if self.fail_after is not None and len(self.batches) == self.fail_after:
+            raise RuntimeError("interrupted")
+        self.batches.append(sorted(queryset.values_list("pk", flat=True)))
+        return queryset.update(text=Concat(F("text"), Value("!")))
+
+
+class RunBackfillTest(TestCase):
+    def setUp(self):
+        self.list_ = List.create_new(first_item_text="0", more_item_texts=[str(n) for n in range(1, 10)])
+        self.pks = sorted(Item.objects.values_list("pk", flat=True))
+
+    def test_updates_every_row_in_pk_ranges(self):
+        backfill = MarkItems()
+        run_backfill(backfill, batch_size=4, pause_seconds=0)
+        self.assertEqual(backfill.batches, [self.pks[:4], self.pks[4:8], self.pks[8:]])
+        self.assertTrue(all(text.endswith("!") for text in Item.objects.values_list("text", flat=True)))
+        checkpoint = BackfillCheckpoint.objects.get(name=backfill.name)
+        self.assertEqual((checkpoint.last_pk, checkpoint.rows), (self.pks[-1], 10))
+        self.assertIsNotNone(checkpoint.finished_at)
+
+    def test_resumes_after_the_last_committed_batch(self):
+        with self.assertRaises(RuntimeError):
+            run_backfill(MarkItems(fail_after=1), batch_size=4, pause_seconds=0)
+        self.assertEqual(BackfillCheckpoint.objects.get().last_pk, self.pks[3])
+
+        backfill = MarkItems()
+        run_backfill(backfill, batch_size=4, pause_seconds=0)
+
+        self.assertEqual(backfill.batches, [self.pks[4:8], self.pks[8:]])
+        self.assertEqual(BackfillCheckpoint.objects.get().rows, 10)
+
+    def test_restart_ignores_the_checkpoint(self):
+        run_backfill(MarkItems(), batch_size=4, pause_seconds=0)
+        backfill = MarkItems()
+        run_backfill(backfill, batch_size=20, pause_seconds=0, restart=True)
+        self.assertEqual(backfill.batches, [[]])
+        self.assertEqual(BackfillCheckpoint.objects.get().rows, 0)
+
+    def test_shrinks_batches_that_take_too_long(self):
+        backfill = MarkItems()
+        run_backfill(backfill, batch_size=4, pause_seconds=0, max_batch_seconds=-1)
+        self.assertEqual([len(batch) for batch in backfill.batches], [4, 2, 1, 1, 1, 1])
+
+    def test_retries_a_batch_while_the_database_is_locked(self):
+        backfill = MarkItems()
+        update = backfill.update
+        calls = []
+
+        def flaky(queryset):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return update(queryset)
+
+        with patch.object(backfill, "update", side_effect=flaky), patch("ops.backfill.time.sleep"):
+            run_backfill(backfill, batch_size=20, pause_seconds=0)
+        self.assertEqual(BackfillCheckpoint.objects.get().rows, 10)
+
+    def test_reports_progress(self):
+        reports = []
+        run_backfill(MarkItems(), batch_size=5, pause_seconds=0, report=lambda p: reports.append(str(p)))
+        self.assertEqual(len(reports), 2)
+        self.assertIn("(50.0%)", reports[0])
+        self.assertIn("ETA", reports[0])
+
+
+class MembershipDisplayNamesTest(TestCase):
+    def test_fills_empty_display_names_from_first_item(self):
+        user = User.objects.create(email="a@b.com")
+        list_ = List.create_new(first_item_text="milk", more_item_texts=["eggs"])
+        empty = List.objects.create()
+        ListMembership.objects.create(user=user, list=list_, role=ListMembership.SHAREE)
+        ListMembership.objects.create(user=user, list=empty, role=ListMembership.SHAREE)
+
+        call_command("run_backfill", "lists.backfills.MembershipDisplayNames", pause=0, stdout=StringIO())
+
+        self.assertEqual(dict(ListMembership.objects.values_list("list_id", "display_name")),
+                         {list_.id: "milk", empty.id: ""})
+
+    def test_command_lists_checkpoints_and_rejects_other_classes(self):
+        run_backfill(MembershipDisplayNames(), batch_size=10, pause_seconds=0)
+        out = StringIO()
+        call_command("run_backfill", stdout=out)
+        self.assertIn("lists.backfills.MembershipDisplayNames: finished", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("run_backfill", "lists.models.Item", stdout=StringIO())
@@ -0,0 +1,109 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import ignore_warnings
+
+from ops.backup import BACKUP_SUFFIX, BackupError, BackupReport, backup_database, copy_online
+
+
+class BackupDatabaseTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, 'db.sqlite3')
+        self.directory = os.path.join(self.tmp.name, 'backups')
+        with sqlite3.connect(self.source) as db:
+            db.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, text TEXT)')
+            db.executemany('INSERT INTO item (text) VALUES (?)', [('x' * 1000,)] * 200)
+
+    def restore(self, path):
+        restored = os.path.join(self.tmp.name, 'restored.sqlite3')
+        with gzip.open(path) as compressed, open(restored, 'wb') as f:
+            f.write(compressed.read())
+        with sqlite3.connect(restored) as db:
+            return db.execute('SELECT count(*) FROM item').fetchone()[0]
+
+    def test_writes_a_compressed_consistent_copy(self):
+        report = backup_database(self.source, self.directory, 'default', pages=16, pause_seconds=0, keep=5)
+        self.assertTrue(report.path.endswith(BACKUP_SUFFIX))
+        self.assertEqual(self.restore(report.path), 200)
+        self.assertLess(report.compressed_bytes, report.database_bytes)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(report.path)])
+
+    def test_writers_get_in_between_pages(self):
+        writes = []
+
+        def write_once(seconds):
+            if not writes:
+                with sqlite3.connect(self.source, timeout=0) as db:
+                    db.execute("INSERT INTO item (text) VALUES ('during backup')")
+                writes.append(1)
+
+        with patch('ops.backup.time.sleep', side_effect=write_once):
+            report = backup_database(self.source, self.directory, 'default', pages=16, pause_seconds=0, keep=5)
+
+        self.assertEqual(writes, [1])
+        self.assertEqual(report.restarts, 1)
+        self.assertEqual(self.restore(report.path), 201)
+
+    @patch('ops.backup.subprocess.run')
+    def test_falls_back_to_the_sqlite3_shell_without_the_backup_api(self, mock_run):
+        with patch('ops.backup.sqlite3.Connection', spec=[]):
+            restarts = copy_online(self.source, 'copy.sqlite3', pages=16, pause_seconds=0)
+        self.assertIn(".backup 'copy.sqlite3'", mock_run.call_args[0][0])
+        self.assertIsNone(restarts)
+        self.assertIn('restarts n/a', str(BackupReport('default.sqlite3.gz', 1024, 512, 1, restarts)))
+
+    @patch('ops.backup.subprocess.run')
+    @ignore_warnings(message='Overriding setting DATABASES')
+    def test_command_warns_that_the_shell_ignores_pages_and_pause(self, mock_run):
+        databases = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.source}}
+        err = StringIO()
+        with override_settings(DATABASES=databases), patch('ops.backup.sqlite3.Connection', spec=[]), \
+                patch('ops.backup.integrity_problems', return_value=[]), patch('ops.backup.compress'), \
+                patch('ops.backup.os.rename'), patch('ops.backup.os.path.getsize', return_value=0):
+            call_command('backup_database', dir=self.directory, pages=16, stdout=StringIO(), stderr=err)
+        self.assertIn('--pages and --pause are ignored', err.getvalue())
+
+    def test_failed_integrity_check_leaves_no_backup(self):
+        with patch('ops.backup.integrity_problems', return_value=['Page 3 is never used']):
+            with self.assertRaisesRegex(BackupError, 'Page 3 is never used'):
+                backup_database(self.source, self.directory, 'default', pages=16, pause_seconds=0, keep=5)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_keeps_only_the_newest_backups(self):
+        os.makedirs(self.directory)
+        for stamp in ['20200101-000000', '20200102-000000', '20200103-000000']:
+            open(os.path.join(self.directory, f'default-{stamp}{BACKUP_SUFFIX}'), 'w').close()
+        open(os.path.join(self.directory, f'sessions-20200101-000000{BACKUP_SUFFIX}'), 'w').close()
+
+        report = backup_database(self.source, self.directory, 'default', pages=16, pause_seconds=0, keep=2)
+
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([
+            f'default-20200103-000000{BACKUP_SUFFIX}', os.path.basename(report.path),
+            f'sessions-20200101-000000{BACKUP_SUFFIX}',
+        ]))
+
+    @ignore_warnings(message='Overriding setting DATABASES')
+    def test_command_backs_up_databases_and_skips_missing_ones(self):
+        databases = {
+            'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': self.source},
+            'sessions': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(self.tmp.name, 'missing')},
+        }
+        out = StringIO()
+        with override_settings(DATABASES=databases):
+            call_command('backup_database', dir=self.directory, pause=0, stdout=out)
+        self.assertIn('MiB/s', out.getvalue())
+        self.assertIn('sessions: ', out.getvalue())
+        self.assertIn('skipping', out.getvalue())
+
+    def test_command_rejects_unknown_database(self):
+        with self.assertRaises(CommandError):
+            call_command('backup_database', databases=['nope'], dir=self.directory, stdout=StringIO())
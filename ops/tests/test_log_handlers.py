@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import queue
+import sys
+import unittest
+from io import StringIO
+
+from ops.log_handlers import JSONFormatter, NonBlockingQueueHandler
+
+
+def make_record(message, level=logging.INFO):
+    return logging.LogRecord('test', level, __file__, 1, message, None, None)
+
+
+class JSONFormatterTest(unittest.TestCase):
+    def test_formats_record_as_json(self):
+        entry = json.loads(JSONFormatter().format(make_record('hello %s', logging.WARNING)))
+        self.assertEqual(entry['message'], 'hello %s')
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['logger'], 'test')
+        self.assertIn('time', entry)
+
+    def test_includes_exception(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('test', logging.ERROR, __file__, 1, 'failed', None, sys.exc_info())
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertIn('ValueError: boom', entry['exc_info'])
+
+
+class NonBlockingQueueHandlerTest(unittest.TestCase):
+    def make_handler(self, **kwargs):
+        self.stream = StringIO()
+        handler = NonBlockingQueueHandler(stream=self.stream, **kwargs)
+        handler.setFormatter(JSONFormatter())
+        self.addCleanup(handler.close)
+        return handler
+
+    def make_handler_without_writer(self, **kwargs):
+        handler = self.make_handler(**kwargs)
+        handler.queue = queue.Queue(handler.capacity)
+        handler._pid = os.getpid()
+        return handler
+
+    def fill(self, handler, count):
+        for _ in range(count):
+            handler.queue.put_nowait(make_record('filler'))
+
+    def written_messages(self):
+        return [json.loads(line)['message'] for line in self.stream.getvalue().splitlines()]
+
+    def test_prepare_replaces_message_with_formatted_line(self):
+        handler = self.make_handler_without_writer()
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('test', logging.ERROR, __file__, 1, 'failed %s', ('here',), sys.exc_info())
+        prepared = handler.prepare(record)
+        entry = json.loads(prepared.msg)
+        self.assertEqual(entry['message'], 'failed here')
+        self.assertIn('ValueError: boom', entry['exc_info'])
+        self.assertIsNone(prepared.args)
+        self.assertIsNone(prepared.exc_info)
+        self.assertEqual((record.msg, record.args), ('failed %s', ('here',)))
+        self.assertIsNotNone(record.exc_info)
+
+    def test_records_are_written_by_background_thread(self):
+        handler = self.make_handler()
+        handler.handle(make_record('one'))
+        handler.handle(make_record('two'))
+        handler.flush_and_stop()
+        self.assertEqual(self.written_messages(), ['one', 'two'])
+
+    def test_drops_low_severity_records_when_queue_is_nearly_full(self):
+        handler = self.make_handler_without_writer(capacity=10, reserved_for_warnings=0.5)
+        self.fill(handler, 5)
+        handler.enqueue(make_record('info'))
+        handler.enqueue(make_record('warning', logging.WARNING))
+        self.assertEqual(handler.dropped, 1)
+        self.assertEqual(handler.queue.queue[-1].msg, 'warning')
+
+    def test_drops_any_record_when_queue_is_full(self):
+        handler = self.make_handler_without_writer(capacity=2)
+        self.fill(handler, 2)
+        handler.enqueue(make_record('error', logging.ERROR))
+        self.assertEqual(handler.dropped, 1)
+
+    def test_reports_dropped_records(self):
+        handler = self.make_handler()
+        handler.dropped = 3
+        handler.handle(make_record('after drops'))
+        handler.flush_and_stop()
+        self.assertIn('Dropped 3 log records, queue was full', self.written_messages())
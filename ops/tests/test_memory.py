@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import tracemalloc
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db.models import query
+from django.test import TestCase, override_settings
+
+from lists import views
+from ops.access import make_ops_token
+from ops.memory import area, diff, module_name
+
+retained = []
+
+
+def allocate_blocks():
+    retained.extend(bytearray(1000) for _ in range(500))
+
+
+class TracingTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(retained.clear)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(5)
+            self.addCleanup(tracemalloc.stop)
+
+
+class ModuleNameTest(TestCase):
+    def test_names_project_and_library_modules(self):
+        self.assertEqual(module_name(views.__file__), 'lists.views')
+        self.assertEqual(module_name(query.__file__), 'django.db.models.query')
+
+    def test_groups_orm_and_templates_into_areas(self):
+        self.assertEqual(area('django.db.models.query'), 'ORM')
+        self.assertEqual(area('django.template.base'), 'templates')
+        self.assertEqual(area('lists.views'), 'lists.views')
+
+
+class DiffTest(TracingTestCase):
+    def test_attributes_growth_to_allocating_module_and_project_caller(self):
+        before = tracemalloc.take_snapshot()
+        allocate_blocks()
+        after = tracemalloc.take_snapshot()
+
+        result = diff(after, before, top=5)
+
+        self.assertEqual(result['modules'][0]['name'], 'ops.tests.test_memory')
+        self.assertGreater(result['modules'][0]['size_diff'], 500 * 1000)
+        self.assertTrue(result['callers'][0]['name'].startswith('ops.tests.test_memory:'))
+
+    def test_groups_by_innermost_frames_whatever_order_tracemalloc_uses(self):
+        frames = [  # innermost first
+            SimpleNamespace(filename=query.__file__, lineno=10),
+            SimpleNamespace(filename=views.__file__, lineno=20),
+            SimpleNamespace(filename='/usr/lib/python3/threading.py', lineno=30),
+        ]
+        for version, traceback in [((3, 6, 9), frames), ((3, 7, 0), frames[::-1])]:
+            stat = SimpleNamespace(traceback=traceback, size_diff=1000, count_diff=1, size=1000)
+            with patch('ops.memory.sys.version_info', version):
+                result = diff(SimpleNamespace(compare_to=lambda old, key: [stat]), None, top=5)
+            self.assertEqual(result['modules'][0]['name'], 'django.db.models.query')
+            self.assertEqual(result['callers'][0]['name'], 'lists.views:20')
+
+
+class MemoryDiagnosticsViewTest(TracingTestCase):
+    def setUp(self):
+        super().setUp()
+        previous_snapshot = patch('ops.memory._previous_snapshot', None)
+        previous_snapshot.start()
+        self.addCleanup(previous_snapshot.stop)
+
+    def post(self, **data):
+        with override_settings(MEMORY_SNAPSHOT_DIR=self.directory):
+            return self.client.post('/ops/memory', data=data, HTTP_X_OPS_TOKEN=make_ops_token())
+
+    def test_requires_ops_token(self):
+        self.assertEqual(self.client.post('/ops/memory', data={'action': 'start'}).status_code, 404)
+
+    def test_second_snapshot_returns_diff(self):
+        first = self.post(action='snapshot')
+        allocate_blocks()
+        second = self.post(action='snapshot')
+
+        self.assertIsNone(first.json()['diff'])
+        modules = [group['name'] for group in second.json()['diff']['modules']]
+        self.assertIn('ops.tests.test_memory', modules)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_other_workers_answer_409(self):
+        response = self.post(action='snapshot', pid=os.getpid() + 1)
+        self.assertEqual(response.status_code, 409)
+
+    def test_unknown_action_is_a_bad_request(self):
+        self.assertEqual(self.post(action='explode').status_code, 400)
+
+    def test_invalid_frames_or_top_is_a_bad_request(self):
+        for frames in ['abc', '0', '']:
+            self.assertEqual(self.post(action='start', frames=frames).status_code, 400)
+        for top in ['abc', '-1']:
+            self.assertEqual(self.post(action='snapshot', top=top).status_code, 400)
+
+
+class MemoryDiffCommandTest(TracingTestCase):
+    def test_prints_growth_by_module(self):
+        old = os.path.join(self.directory, 'old.tracemalloc')
+        new = os.path.join(self.directory, 'new.tracemalloc')
+        tracemalloc.take_snapshot().dump(old)
+        allocate_blocks()
+        tracemalloc.take_snapshot().dump(new)
+        out = StringIO()
+
+        call_command('memory_diff', old, new, '--top', '3', stdout=out)
+
+        self.assertIn('Growth by allocating module', out.getvalue())
+        self.assertIn('ops.tests.test_memory', out.getvalue())
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ops.access import make_ops_token
+from ops.profiling import StackSampler, rotate_profiles, write_profile
+
+
+def busy_wait(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+class ProfileDirectoryTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def profile_files(self):
+        return sorted(os.listdir(self.directory))
+
+
+class StackSamplerTest(TestCase):
+    def test_collects_collapsed_stacks_of_target_thread(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        busy_wait(0.05)
+        sampler.stop()
+        self.assertGreater(sum(sampler.stacks.values()), 0)
+        self.assertTrue(any('ops.tests.test_profiling:busy_wait' in stack for stack in sampler.stacks))
+
+
+class ProfileFilesTest(ProfileDirectoryTestCase):
+    def test_writes_folded_stacks(self):
+        filename = write_profile(self.directory, 'view_list', Counter({'a:f;b:g': 3}), max_files=10)
+        self.assertTrue(filename.startswith('view_list.'))
+        with open(os.path.join(self.directory, filename)) as f:
+            self.assertEqual(f.read(), 'a:f;b:g 3\n')
+
+    def test_rotation_keeps_newest_files(self):
+        for i in range(3):
+            path = os.path.join(self.directory, f'home.{i}.0.1.folded')
+            open(path, 'w').close()
+            os.utime(path, (i, i))
+        rotate_profiles(self.directory, max_files=2)
+        self.assertEqual(self.profile_files(), ['home.1.0.1.folded', 'home.2.0.1.folded'])
+
+
+class ProfilingMiddlewareTest(ProfileDirectoryTestCase):
+    def get_home(self, **extra):
+        with override_settings(PROFILING_DIR=self.directory):
+            return self.client.get('/', **extra)
+
+    def test_doesnt_profile_without_token(self):
+        self.get_home()
+        self.assertEqual(self.profile_files(), [])
+
+    def test_profiles_request_with_signed_header(self):
+        self.get_home(HTTP_X_PROFILE=make_ops_token())
+        self.assertEqual(len(self.profile_files()), 1)
+        self.assertTrue(self.profile_files()[0].startswith('home.'))
+
+    def test_profiles_request_with_signed_query_flag(self):
+        with override_settings(PROFILING_DIR=self.directory):
+            self.client.get('/?_profile=' + make_ops_token())
+        self.assertEqual(len(self.profile_files()), 1)
+
+    def test_ignores_forged_token(self):
+        self.get_home(HTTP_X_PROFILE='ops:forged:signature')
+        self.assertEqual(self.profile_files(), [])
+
+    def test_profiles_sampled_requests(self):
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            self.get_home()
+        self.assertEqual(len(self.profile_files()), 1)
+
+
+class ProfileReportCommandTest(ProfileDirectoryTestCase):
+    def test_merges_profiles_per_url_name(self):
+        write_profile(self.directory, 'view_list', Counter({'a:f;b:g': 3}), max_files=10)
+        write_profile(self.directory, 'view_list', Counter({'a:f;b:g': 2, 'a:f': 1}), max_files=10)
+        write_profile(self.directory, 'home', Counter({'a:f': 4}), max_files=10)
+        output = os.path.join(self.directory, 'report')
+        stdout = StringIO()
+
+        call_command('profile_report', profiles=self.directory, output=output, stdout=stdout)
+
+        with open(os.path.join(output, 'view_list.folded')) as f:
+            self.assertEqual(f.read(), 'a:f;b:g 5\na:f 1\n')
+        self.assertIn('view_list: 2 requests, 6 samples', stdout.getvalue())
+        self.assertIn('home: 1 requests, 4 samples', stdout.getvalue())
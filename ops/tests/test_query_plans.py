@@ -0,0 +1,22 @@
+from django.db import connection
+from django.test import TestCase
+
+from ops.query_plans import Sample, canonical_queries, full_scans, seed
+from ops.sql import explain_query_plan
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(lists=200, items_per_list=5, users=40)
+
+    def test_hot_queries_dont_scan_large_tables(self):
+        for name, queryset in canonical_queries(Sample()).items():
+            sql, params = queryset.query.sql_with_params()
+            with self.subTest(query=name):
+                self.assertEqual(full_scans(explain_query_plan(connection, sql, params)), [])
+
+    def test_detects_full_table_scans(self):
+        self.assertEqual(full_scans(['SCAN TABLE lists_item']), ['SCAN TABLE lists_item'])
+        self.assertEqual(full_scans(['SCAN lists_item']), ['SCAN lists_item'])
+        self.assertEqual(full_scans(['SEARCH lists_item USING INDEX x (list_id=?)']), [])
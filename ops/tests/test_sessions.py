@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import Token
+from lists.models import List
+from ops.sessions import delete_expired_sessions
+from superlists.routers import SESSIONS_DATABASE, SessionRouter
+
+
+class SessionRouterTest(TestCase):
+    def test_sessions_go_to_sessions_database(self):
+        self.assertEqual(router.db_for_write(Session), SESSIONS_DATABASE)
+        self.assertEqual(router.db_for_read(Session), SESSIONS_DATABASE)
+
+    def test_list_data_stays_in_default_database(self):
+        self.assertEqual(router.db_for_write(List), 'default')
+
+    def test_tokens_are_optionally_routed(self):
+        self.assertEqual(router.db_for_write(Token), 'default')
+        with override_settings(SESSIONS_DATABASE_MODELS=['sessions.session', 'accounts.token']):
+            self.assertEqual(SessionRouter().db_for_write(Token), SESSIONS_DATABASE)
+
+    def test_only_routed_tables_are_migrated_into_sessions_database(self):
+        session_router = SessionRouter()
+        self.assertTrue(session_router.allow_migrate(SESSIONS_DATABASE, 'sessions', 'session'))
+        self.assertFalse(session_router.allow_migrate('default', 'sessions', 'session'))
+        self.assertFalse(session_router.allow_migrate(SESSIONS_DATABASE, 'lists', 'item'))
+        self.assertFalse(session_router.allow_migrate(SESSIONS_DATABASE, 'lists'))
+        self.assertTrue(session_router.allow_migrate('default', 'lists', 'item'))
+
+
+class DeleteExpiredSessionsTest(TestCase):
+    multi_db = True
+
+    def setUp(self):
+        Session.objects.all().delete()
+
+    def create_sessions(self, count, expire_date):
+        Session.objects.bulk_create(
+            Session(session_key=f'{expire_date:%s}-{n}', session_data='', expire_date=expire_date)
+            for n in range(count)
+        )
+
+    @patch('ops.sessions.time.sleep')
+    def test_deletes_only_expired_sessions_in_chunks(self, mock_sleep):
+        now = timezone.now()
+        self.create_sessions(5, now - timedelta(days=1))
+        self.create_sessions(2, now + timedelta(days=1))
+
+        deleted = delete_expired_sessions(chunk_size=2, pause_seconds=0.5, now=now)
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(Session.objects.filter(expire_date__lt=now).exists())
+        self.assertEqual(Session.objects.filter(expire_date__gt=now).count(), 2)
+        self.assertEqual(mock_sleep.call_count, 2)
@@ -0,0 +1,70 @@
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from lists.models import List, Item
+from ops.sql import QueryLogMiddleware, TimedCursorWrapper, explain_query_plan
+
+
+def view_with_repeated_queries(request):
+    for _ in range(3):
+        list(List.objects.filter(id=1))
+    return HttpResponse()
+
+
+class ExplainQueryPlanTest(TestCase):
+    def test_returns_plan_details(self):
+        sql, params = Item.objects.filter(list_id=1).query.sql_with_params()
+        plan = explain_query_plan(connection, sql, params)
+        self.assertTrue(any('lists_item' in line for line in plan))
+
+
+class QueryInstrumentationTest(TestCase):
+    def test_connection_cursors_are_timed(self):
+        with connection.cursor() as cursor:
+            self.assertIsInstance(cursor, TimedCursorWrapper)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_queries_are_logged_with_their_plan(self):
+        with self.assertLogs('ops.sql', 'WARNING') as logs:
+            list(Item.objects.filter(list_id=1))
+        self.assertIn('Slow query', logs.output[0])
+        self.assertIn('lists_item', logs.output[0])
+        self.assertIn('plan:', logs.output[0])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_log_names_the_originating_view(self):
+        list_ = List.objects.create()
+        with self.assertLogs('ops.sql', 'WARNING') as logs:
+            self.client.get(f'/lists/{list_.id}/')
+        self.assertTrue(any('lists.views.view_list' in line for line in logs.output))
+
+    def test_fast_queries_are_not_logged(self):
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('ops.sql', 'WARNING'):
+                list(Item.objects.filter(list_id=1))
+
+
+class QueryLogMiddlewareTest(TestCase):
+    @override_settings(N_PLUS_ONE_THRESHOLD=3)
+    def test_repeated_statements_are_reported_as_n_plus_one(self):
+        request = RequestFactory().get('/repeated')
+
+        def get_response(request):
+            middleware.process_view(request, view_with_repeated_queries, (), {})
+            return view_with_repeated_queries(request)
+        middleware = QueryLogMiddleware(get_response)
+
+        with self.assertLogs('ops.sql', 'WARNING') as logs:
+            middleware(request)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Possible N+1: 3 executions', logs.output[0])
+        self.assertIn('view_with_repeated_queries', logs.output[0])
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=4)
+    def test_statements_below_threshold_are_not_reported(self):
+        middleware = QueryLogMiddleware(view_with_repeated_queries)
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('ops.sql', 'WARNING'):
+                middleware(RequestFactory().get('/repeated'))
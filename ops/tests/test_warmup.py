@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import get_resolver
+
+from ops import warmup
+
+
+class WarmUpTest(SimpleTestCase):
+    allow_database_queries = True
+
+    def test_loads_every_warm_template(self):
+        with patch('ops.warmup.get_template') as mock_get_template:
+            warmup.warm_templates()
+        self.assertEqual([c[0][0] for c in mock_get_template.call_args_list], warmup.WARM_TEMPLATES)
+
+    def test_warm_templates_exist(self):
+        warmup.warm_templates()  # should not raise
+
+    def test_populates_url_resolver(self):
+        warmup.warm_url_resolvers()
+        self.assertTrue(get_resolver()._populated)
+
+    @patch('ops.warmup.connections')
+    def test_closes_connections_before_fork(self, mock_connections):
+        mock_connections.all.return_value = [connection]
+        warmup.warm_database_connections()
+        mock_connections.close_all.assert_called_once_with()
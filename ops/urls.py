@@ -0,0 +1,8 @@
+from django.conf.urls import url
+
+from ops import views
+
+urlpatterns = [
+    url(r'^admission$', views.admission_stats, name='admission_stats'),
+    url(r'^memory$', views.memory_diagnostics, name='memory_diagnostics'),
+]
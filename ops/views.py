@@ -0,0 +1,50 @@
+import os
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from ops import admission, memory
+from ops.access import ops_only
+
+
+@ops_only
+def admission_stats(request):
+    return JsonResponse(dict(admission.counters.snapshot(), pid=os.getpid()))
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+# Each worker traces its own memory, and a request can land on any worker:
+# pass the pid from an earlier response to get 409 from the others (retry).
+@csrf_exempt
+@ops_only
+def memory_diagnostics(request):
+    expected_pid = request.GET.get('pid') or request.POST.get('pid')
+    if expected_pid and expected_pid != str(os.getpid()):
+        return JsonResponse({'error': 'reached another worker, retry', 'pid': os.getpid()}, status=409)
+    if request.method != 'POST':
+        return JsonResponse(memory.status())
+    action = request.POST.get('action')
+    if action == 'start':
+        frames = positive_int(request.POST.get('frames', settings.TRACEMALLOC_FRAMES))
+        if frames is None:
+            return JsonResponse({'error': "'frames' must be a positive integer"}, status=400)
+        return JsonResponse(memory.start(frames))
+    if action == 'stop':
+        return JsonResponse(memory.stop())
+    if action == 'snapshot':
+        if not memory.status()['tracing']:
+            return JsonResponse({'error': 'tracemalloc is not tracing in this worker', 'pid': os.getpid()}, status=409)
+        top = positive_int(request.POST.get('top', settings.MEMORY_DIFF_TOP))
+        if top is None:
+            return JsonResponse({'error': "'top' must be a positive integer"}, status=400)
+        filename, diff = memory.snapshot_and_diff(settings.MEMORY_SNAPSHOT_DIR, top)
+        return JsonResponse(dict(memory.status(), snapshot=filename, diff=diff))
+    return JsonResponse({'error': "action must be 'start', 'snapshot' or 'stop'"}, status=400)
@@ -0,0 +1,38 @@
+from django.apps import apps
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+WARM_TEMPLATES = ['base.html', 'home.html', 'list.html', 'my_lists.html']
+
+
+def warm_url_resolvers():
+    resolver = get_resolver()
+    resolver.reverse_dict
+    resolver.resolve('/')
+
+
+def warm_templates():
+    for template_name in WARM_TEMPLATES:
+        get_template(template_name)
+
+
+def warm_models():
+    for model in apps.get_models():
+        model._meta.get_fields()
+
+
+def warm_database_connections():
+    # Opening a connection loads the backend and runs its setup queries, but
+    # a database handle must never be shared with forked workers, so close
+    # it again; each worker reconnects on its first query.
+    for connection in connections.all():
+        connection.ensure_connection()
+    connections.close_all()
+
+
+def warm_up():
+    warm_url_resolvers()
+    warm_templates()
+    warm_models()
+    warm_database_connections()
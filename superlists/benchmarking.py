@@ -0,0 +1,31 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+# Benchmarks run against a throwaway, fully migrated SQLite file so they
+# never touch the real database and still see real file locking and fsyncs.
+@contextmanager
+def benchmark_database(alias='default'):
+    connection = connections[alias]
+    original_name = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(original_name, verbosity=0)
+
+
+@contextmanager
+def timer():
+    timing = {}
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['seconds'] = time.perf_counter() - start
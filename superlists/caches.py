@@ -0,0 +1,17 @@
+import random
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+# FileBasedCache lists the whole cache directory on every set() to decide
+# whether to cull, so writes get slower as the cache fills up. Only check on
+# a random sample of sets; the cache may overshoot MAX_ENTRIES by roughly
+# CULL_CHECK_EVERY entries in between.
+class SampledCullFileBasedCache(FileBasedCache):
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self.cull_check_every = int(params.get('OPTIONS', {}).get('CULL_CHECK_EVERY', 100))
+
+    def _cull(self):
+        if random.randrange(self.cull_check_every) == 0:
+            super()._cull()
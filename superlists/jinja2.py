@@ -0,0 +1,44 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.backends import jinja2 as jinja2_backend
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.urls import reverse
+from jinja2 import Environment
+
+from lists.templatetags.lists_tags import idempotency_key_field
+
+
+def url(viewname, *args):
+    return reverse(viewname, args=args)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': staticfiles_storage.url,
+        'url': url,
+        'idempotency_key_field': idempotency_key_field,
+    })
+    return env
+
+
+# Django's own Jinja2 backend lets context processors overwrite the view's
+# context (my_lists passes its own "user"); apply them first instead, the
+# way DjangoTemplates does, so both engines see the same context.
+class Template(jinja2_backend.Template):
+    def render(self, context=None, request=None):
+        if request is None:
+            return super().render(context)
+        full_context = {
+            'request': request,
+            'csrf_input': csrf_input_lazy(request),
+            'csrf_token': csrf_token_lazy(request),
+        }
+        for context_processor in self.backend.template_context_processors:
+            full_context.update(context_processor(request))
+        full_context.update(context or {})
+        return self.template.render(full_context)
+
+
+class Jinja2(jinja2_backend.Jinja2):
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
@@ -0,0 +1,26 @@
+from django.conf import settings
+
+SESSIONS_DATABASE = 'sessions'
+
+
+# Keeps session (and, optionally, login token) rows in their own SQLite file
+# so their writes never wait on the lock held by list and item inserts.
+class SessionRouter:
+    def _routed(self, app_label, model_name):
+        return f'{app_label}.{model_name}' in settings.SESSIONS_DATABASE_MODELS
+
+    def db_for_read(self, model, **hints):
+        if self._routed(model._meta.app_label, model._meta.model_name):
+            return SESSIONS_DATABASE
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is None:
+            # RunPython/RunSQL operations: keep the apps that own no routed
+            # models out of the sessions database.
+            if any(label.split('.')[0] == app_label for label in settings.SESSIONS_DATABASE_MODELS):
+                return None
+            return db != SESSIONS_DATABASE
+        return self._routed(app_label, model_name) == (db == SESSIONS_DATABASE)
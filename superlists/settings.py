@@ -27,9 +27,17 @@ else:
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'ops.log_handlers.JSONFormatter',
+        },
+    },
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            'class': 'ops.log_handlers.NonBlockingQueueHandler',
+            'formatter': 'json',
+            'capacity': 10000,
+            'batch_size': 200,
         },
     },
     'root': {
@@ -55,9 +63,14 @@ INSTALLED_APPS = [
     'lists',
     'accounts',
     'functional_tests',
+    'ops',
+    'tasks',
 ]
 
 MIDDLEWARE = [
+    'ops.admission.AdmissionControlMiddleware',
+    'ops.profiling.ProfilingMiddleware',
+    'ops.sql.QueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,8 +96,25 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'superlists.jinja2.Jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'superlists.jinja2.environment',
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
 ]
 
+# Which engine renders the list pages: 'django' or 'jinja2'. Compare them
+# with `manage.py bench_templates`.
+LISTS_TEMPLATE_ENGINE = os.environ.get('LISTS_TEMPLATE_ENGINE', 'django')
+
 WSGI_APPLICATION = 'superlists.wsgi.application'
 
 
@@ -95,8 +125,125 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'sessions': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db_sessions.sqlite3'),
+    },
+}
+
+DATABASE_ROUTERS = ['superlists.routers.SessionRouter']
+
+# Models stored in the 'sessions' database, as "app_label.model_name".
+SESSIONS_DATABASE_MODELS = ['sessions.session']
+if os.environ.get('SESSIONS_DATABASE_TOKENS') == 'y':
+    SESSIONS_DATABASE_MODELS.append('accounts.token')
+EXPIRED_SESSIONS_CHUNK_SIZE = 500
+EXPIRED_SESSIONS_PAUSE_SECONDS = 0.05
+
+# Online snapshots taken by `manage.py backup_database` (ops.backup).
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_PAUSE_SECONDS = 0.005
+BACKUP_KEEP = 14
+
+# Deferred work (tasks.queue), run by `manage.py run_tasks`. In development
+# @task functions run right away instead of waiting for a consumer.
+TASKS_ALWAYS_EAGER = DEBUG
+TASKS_CONSUMERS = int(os.environ.get('TASKS_CONSUMERS', 2))
+TASKS_POLL_SECONDS = 0.5
+TASKS_RETRY_DELAY_SECONDS = 10
+TASKS_STALE_SECONDS = 15 * 60
+TASKS_KEEP_DONE_DAYS = 7
+
+# Batched data changes run with `manage.py run_backfill` (ops.backfill).
+BACKFILL_BATCH_SIZE = 500
+BACKFILL_PAUSE_SECONDS = 0.05
+BACKFILL_MAX_BATCH_MS = 200
+
+# Hand item inserts to a per-process committer thread that group-commits
+# them every few milliseconds (see lists.batching).
+LISTS_BATCH_ITEM_WRITES = os.environ.get('LISTS_BATCH_ITEM_WRITES') == 'y'
+
+# Live updates (lists.events) each hold a request thread for as long as the
+# page is open; past this many streams per worker, pages poll for changes.
+LIST_EVENT_STREAMS_PER_WORKER = int(os.environ.get('LIST_EVENT_STREAMS_PER_WORKER', 4))
+
+LIST_VIEW_FLUSH_SECONDS = 10
+LIST_VIEW_MAX_PENDING = 10000
+
+# Published lists are rendered to static files (lists.snapshots) that nginx
+# serves to anonymous readers; 0 workers renders inline, in the request.
+LIST_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+LIST_SNAPSHOT_WORKERS = int(os.environ.get('LIST_SNAPSHOT_WORKERS', 2))
+
+LIST_ARCHIVE_AFTER_DAYS = 60
+LIST_ARCHIVE_BATCH_SIZE = 200
+LIST_ARCHIVE_PAUSE_SECONDS = 0.05
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Shared by all workers on the host, so a retry that lands on another
+    # worker is still answered from the stored response.
+    'idempotency': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'idempotency'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    # Shared by all workers on the host; see accounts.session_store.
+    'sessions': {
+        'BACKEND': 'superlists.caches.SampledCullFileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'sessions'),
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_CHECK_EVERY': 100},
+    },
+}
+
+# The test runner swaps these for in-memory caches.
+TEST_RUNNER = 'superlists.test_runner.TestRunner'
+
+SESSION_ENGINE = 'accounts.session_store'
+SESSION_CACHE_ALIAS = 'sessions'
+
+IDEMPOTENCY_CACHE = 'idempotency'
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+
+# Signed tokens from `manage.py ops_token` unlock profiling and diagnostics.
+OPS_TOKEN_MAX_AGE = 60 * 60
+
+# Requests are profiled when they carry a valid token in the X-Profile
+# header or _profile query flag, or at random with this probability.
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_INTERVAL_SECONDS = 0.002
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_MAX_FILES = 500
+
+# Frames kept per allocation by /ops/memory (ops.memory). Set
+# TRACEMALLOC_AT_STARTUP=y in .env to trace every worker from startup.
+TRACEMALLOC_FRAMES = int(os.environ.get('TRACEMALLOC_FRAMES', 10))
+TRACEMALLOC_AT_STARTUP = os.environ.get('TRACEMALLOC_AT_STARTUP') == 'y'
+MEMORY_SNAPSHOT_DIR = os.path.join(PROFILING_DIR, 'memory')
+MEMORY_DIFF_TOP = 25
+
+# Admission control (ops.admission). The in-flight limits count reads and
+# writes together; writes get the higher limits, so reads are shed first.
+ADMISSION_LIMITS = {
+    'read': {'worker': 12, 'host': 36},
+    'write': {'worker': 16, 'host': 48},
 }
+ADMISSION_MAX_QUEUE_WAIT_MS = {'read': 1000, 'write': 3000}
+ADMISSION_RETRY_AFTER_SECONDS = 2
+ADMISSION_WORKER_SLOTS = 64
+ADMISSION_EXEMPT_PATHS = [r'^/ops/', r'^/static/']
+ADMISSION_STALE_PAGES = 500
+ADMISSION_STALE_SECONDS = 300
+
+# Statements slower than this are logged with their query plan, and a
+# statement repeated this many times in one request is flagged as N+1.
+SLOW_QUERY_LOG_DATABASES = ['default']
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+N_PLUS_ONE_THRESHOLD = 10
 
 AUTH_USER_MODEL = 'accounts.User'
 AUTHENTICATION_BACKENDS = [
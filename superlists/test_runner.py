@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+# Runs the tests with every cache in memory, so the suite doesn't leave
+# session and idempotency files behind in BASE_DIR/cache.
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = override_settings(CACHES={
+            alias: {'BACKEND': LOCMEM_CACHE, 'LOCATION': alias} for alias in settings.CACHES
+        })
+        self._caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,26 @@
+import logging
+import signal
+
+logger = logging.getLogger(__name__)
+
+
+# The loop of one `run_tasks` consumer process; `stop` is a multiprocessing
+# Event. This module imports nothing from Django at the top, since a
+# spawned process imports it before Django is set up.
+def consume(stop, poll_seconds):
+    # Ctrl-C reaches the whole process group; run_tasks stops us through
+    # `stop` instead, so the current task is never cut short.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import django
+    django.setup()
+    from django.db import connection
+    from tasks.queue import run_next
+
+    while not stop.is_set():
+        try:
+            if run_next() is None:
+                stop.wait(poll_seconds)
+        except Exception:
+            logger.exception("Task consumer error")
+            connection.close()
+            stop.wait(poll_seconds)
@@ -0,0 +1,63 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.consumer import consume
+from tasks.queue import purge_done, requeue_stale, run_next
+
+# Tasks left running by a consumer that was killed (an OOM kill leaves the
+# pool running) are requeued without waiting for a restart.
+MAINTENANCE_EVERY_SECONDS = 5 * 60
+
+
+class Command(BaseCommand):
+    help = 'Runs deferred @task calls in a pool of consumer processes until stopped (SIGTERM or Ctrl-C).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumers', type=int, default=settings.TASKS_CONSUMERS)
+        parser.add_argument('--poll', type=float, default=settings.TASKS_POLL_SECONDS)
+        parser.add_argument('--once', action='store_true', help='Run queued tasks in this process, then exit.')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale(settings.TASKS_STALE_SECONDS)
+        purged = purge_done(settings.TASKS_KEEP_DONE_DAYS)
+        self.stdout.write(f'Requeued {requeued} stale tasks, purged {purged} finished ones')
+        if options['once']:
+            ran = 0
+            while run_next() is not None:
+                ran += 1
+            self.stdout.write(f'Ran {ran} tasks')
+            return
+
+        # Consumers are spawned, so each sets up Django and connects on its own.
+        # They finish their current task once `stop` is set.
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+        consumers = {}
+        last_maintenance = time.monotonic()
+        try:
+            while not stopping:
+                for n in range(options['consumers']):
+                    if n not in consumers or not consumers[n].is_alive():
+                        consumers[n] = context.Process(target=consume, args=(stop, options['poll']),
+                                                       name=f'task-consumer-{n}')
+                        consumers[n].start()
+                time.sleep(1)
+                if time.monotonic() - last_maintenance > MAINTENANCE_EVERY_SECONDS:
+                    requeue_stale(settings.TASKS_STALE_SECONDS)
+                    purge_done(settings.TASKS_KEEP_DONE_DAYS)
+                    connections.close_all()
+                    last_maintenance = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        stop.set()
+        for consumer in consumers.values():
+            consumer.join()
+        self.stdout.write('Task consumers stopped')
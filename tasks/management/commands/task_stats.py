@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Shows per-task counts, retries and run times of recent deferred tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timedelta(hours=options['hours'])
+        stats = (Task.objects.filter(created_at__gte=since).values('name', 'status')
+                 .annotate(count=Count('pk'), attempts=Sum('attempts'),
+                           avg_ms=Avg('duration_ms'), max_ms=Max('duration_ms'))
+                 .order_by('name', 'status'))
+        self.stdout.write(f'{"task":<45} {"status":<8} {"count":>7} {"retries":>7} {"avg ms":>9} {"max ms":>9}')
+        for row in stats:
+            retries = max((row['attempts'] or 0) - row['count'], 0) if row['status'] != Task.QUEUED else 0
+            self.stdout.write(
+                f'{row["name"]:<45} {row["status"]:<8} {row["count"]:>7} {retries:>7} '
+                f'{row["avg_ms"] or 0:>9.1f} {row["max_ms"] or 0:>9.1f}'
+            )
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+
+# One deferred call of a @task function (tasks.queue), with its arguments
+# as JSON. Rows are kept after they finish for the timing metrics in
+# `manage.py task_stats`.
+class Task(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = ((QUEUED, "queued"), (RUNNING, "running"), (DONE, "done"), (FAILED, "failed"))
+
+    name = models.CharField(max_length=200)
+    arguments = models.TextField(default="[[], {}]")
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(max_length=7, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    duration_ms = models.FloatField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+
+    class Meta:
+        index_together = [("status", "priority", "run_after")]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,116 @@
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class TaskFunction:
+    def __init__(self, func, priority, max_attempts):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.priority = priority
+        self.max_attempts = max_attempts
+        registry[self.name] = self
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def defer(self, *args, **kwargs):
+        # Queued in the caller's transaction, so a rolled back request
+        # leaves no task behind. Arguments must be JSON serializable.
+        if settings.TASKS_ALWAYS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+        return Task.objects.create(
+            name=self.name, arguments=json.dumps([args, kwargs]),
+            priority=self.priority, max_attempts=self.max_attempts,
+        )
+
+
+# Turns a module-level function into a task: calling it still runs it
+# right away, `.defer(...)` queues it for `manage.py run_tasks`. Higher
+# priorities run first.
+def task(priority=0, max_attempts=3):
+    def decorator(func):
+        return TaskFunction(func, priority, max_attempts)
+    return decorator
+
+
+def get_task_function(name):
+    if name not in registry:
+        import_string(name)
+    return registry[name]
+
+
+def claim_next(now=None):
+    # Another consumer may claim the same candidate first; the conditional
+    # UPDATE lets exactly one of them have it.
+    now = now or timezone.now()
+    candidates = (Task.objects.filter(status=Task.QUEUED, run_after__lte=now)
+                  .order_by("-priority", "run_after", "pk").values_list("pk", flat=True)[:5])
+    for pk in candidates:
+        claimed = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started_at=now, attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run(task_row):
+    started = time.perf_counter()
+    try:
+        args, kwargs = json.loads(task_row.arguments)
+        get_task_function(task_row.name).func(*args, **kwargs)
+    except Exception:
+        task_row.last_error = traceback.format_exc()[-4000:]
+        if task_row.attempts < task_row.max_attempts:
+            task_row.status = Task.QUEUED
+            delay = settings.TASKS_RETRY_DELAY_SECONDS * 2 ** (task_row.attempts - 1)
+            task_row.run_after = timezone.now() + timedelta(seconds=delay)
+        else:
+            task_row.status = Task.FAILED
+        logger.warning("Task %s failed (attempt %d of %d)", task_row, task_row.attempts, task_row.max_attempts,
+                       exc_info=True)
+    else:
+        task_row.status = Task.DONE
+    task_row.finished_at = timezone.now()
+    task_row.duration_ms = (time.perf_counter() - started) * 1000
+    task_row.save()
+    logger.info("Task %s took %.1f ms after waiting %.1f ms", task_row, task_row.duration_ms,
+                (task_row.started_at - task_row.created_at).total_seconds() * 1000)
+    return task_row
+
+
+def run_next():
+    task_row = claim_next()
+    if task_row is not None:
+        run(task_row)
+    return task_row
+
+
+def requeue_stale(older_than_seconds, now=None):
+    # Tasks left running by a consumer that died mid-task. Attempts are
+    # counted when a task is claimed, so one that keeps killing its
+    # consumer still runs out of them.
+    cutoff = (now or timezone.now()) - timedelta(seconds=older_than_seconds)
+    stale = Task.objects.filter(status=Task.RUNNING, started_at__lt=cutoff)
+    stale.filter(attempts__gte=F("max_attempts")).update(status=Task.FAILED, last_error="Consumer died")
+    return stale.update(status=Task.QUEUED)
+
+
+def purge_done(days, now=None):
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Task.objects.filter(status=Task.DONE, finished_at__lt=cutoff).delete()[0]
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import claim_next, purge_done, requeue_stale, run, run_next, task
+
+calls = []
+
+
+@task()
+def record(value, extra=None):
+    calls.append((value, extra))
+
+
+@task(priority=5)
+def urgent(value):
+    calls.append(("urgent", value))
+
+
+@task(max_attempts=2)
+def flaky():
+    raise RuntimeError("boom")
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_RETRY_DELAY_SECONDS=10)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_defer_queues_the_call_instead_of_running_it(self):
+        task_row = record.defer(1, extra="x")
+        self.assertEqual(calls, [])
+        self.assertEqual((task_row.name, task_row.status), ("tasks.tests.test_queue.record", Task.QUEUED))
+
+        run_next()
+
+        self.assertEqual(calls, [(1, "x")])
+        task_row.refresh_from_db()
+        self.assertEqual((task_row.status, task_row.attempts), (Task.DONE, 1))
+        self.assertIsNotNone(task_row.duration_ms)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_right_away(self):
+        self.assertIsNone(record.defer(2))
+        self.assertEqual(calls, [(2, None)])
+        self.assertFalse(Task.objects.exists())
+
+    def test_higher_priority_runs_first(self):
+        record.defer(1)
+        urgent.defer(2)
+        run_next()
+        run_next()
+        self.assertEqual(calls, [("urgent", 2), (1, None)])
+
+    def test_a_task_is_claimed_only_once(self):
+        record.defer(1)
+        self.assertIsNotNone(claim_next())
+        self.assertIsNone(claim_next())
+
+    def test_failures_are_retried_later_then_marked_failed(self):
+        task_row = flaky.defer()
+        with self.assertLogs("tasks.queue", "WARNING"):
+            run_next()
+        task_row.refresh_from_db()
+        self.assertEqual((task_row.status, task_row.attempts), (Task.QUEUED, 1))
+        self.assertIn("RuntimeError: boom", task_row.last_error)
+        self.assertGreater(task_row.run_after, timezone.now() + timedelta(seconds=5))
+        self.assertIsNone(run_next())
+
+        with self.assertLogs("tasks.queue", "WARNING"):
+            run(claim_next(now=task_row.run_after))
+        task_row.refresh_from_db()
+        self.assertEqual((task_row.status, task_row.attempts), (Task.FAILED, 2))
+
+    def test_stale_running_tasks_are_requeued_until_out_of_attempts(self):
+        record.defer(1)
+        claim_next()
+        later = timezone.now() + timedelta(hours=1)
+        self.assertEqual(requeue_stale(60, now=later), 1)
+        self.assertEqual(Task.objects.get().status, Task.QUEUED)
+
+        Task.objects.update(status=Task.RUNNING, attempts=3)
+        requeue_stale(60, now=later)
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_purges_old_finished_tasks(self):
+        record.defer(1)
+        run_next()
+        self.assertEqual(purge_done(7), 0)
+        self.assertEqual(purge_done(7, now=timezone.now() + timedelta(days=8)), 1)
+
+    def test_run_tasks_once_and_stats(self):
+        record.defer(1)
+        record.defer(2)
+        out = StringIO()
+        call_command("run_tasks", once=True, stdout=out)
+        self.assertIn("Ran 2 tasks", out.getvalue())
+        self.assertEqual(len(calls), 2)
+
+        out = StringIO()
+        call_command("task_stats", stdout=out)
+        self.assertRegex(out.getvalue(), r"tasks\.tests\.test_queue\.record\s+done\s+2\s+0")
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class DeferredViewWorkTest(TestCase):
+    @patch("accounts.views.send_mail")
+    def test_login_email_is_sent_by_a_task(self, mock_send_mail):
+        self.client.post("/accounts/send_login_email", data={"email": "edith@example.com"})
+        mock_send_mail.assert_not_called()
+        self.assertEqual(Task.objects.get().name, "accounts.views.send_login_mail")
+
+        run_next()
+
+        self.assertTrue(mock_send_mail.called)